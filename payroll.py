@@ -1,24 +1,211 @@
+import sys
+
+# "python -m payroll run ..." is the headless batch mode: dispatch before any
+# GUI toolkit is imported so it works on a machine without a display.
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from payroll_core.cli import main
+    sys.exit(main())
+
 from tkinter import Canvas, Toplevel, Tk
 from tkinter import messagebox, filedialog
 from tkinter.ttk import Button, Scrollbar, Style, Frame, Treeview
-from tkinter.ttk import Label, LabelFrame, Combobox, Entry
-import sqlite3
+from tkinter.ttk import Label, LabelFrame, Combobox, Entry, Progressbar
 from datetime import datetime
-from reportlab.lib.colors import grey, whitesmoke, beige, black
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
-from reportlab.lib.units import inch
-from pandas import DataFrame, ExcelWriter
-from docx import Document
-import openpyxl
-from reportlab.platypus import Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
+import queue
+from threading import Thread
 import os
-from bidi.algorithm import get_display  # For RTL text reordering
-import arabic_reshaper  # For reshaping Arabic text
+from payroll_core import db, engine, money, perf, rates, writer
+from payroll_core.loader import PageReader
+
+class VirtualTreeview:
+    # Extra windows of rows cached on each side of the visible one
+    PREFETCH_WINDOWS = 2
+    # How often the GUI thread picks up results from the loader thread
+    POLL_MS = 30
+
+    def __init__(self, tree, scrollbar, progress, status_label):
+        # The tree only ever holds the rows on screen; the scrollbar is
+        # driven from the query's row count instead of the tree's contents.
+        # Counting and paging run on a worker thread with its own connection.
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.progress = progress
+        self.status_label = status_label
+        self.reader = None
+        self.results = queue.Queue()
+        self.column = None
+        self.term = None
+        self.total_rows = None
+        self.top = 0
+        self.cache_start = 0
+        self.cache = []
+        self.pending = None
+        self.busy = False
+        self.poll_id = None
+
+        scrollbar.config(command=self.on_scroll)
+        tree.bind("<Configure>", lambda event: self.refresh())
+        tree.bind("<MouseWheel>", self.on_mousewheel)
+        tree.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        tree.bind("<Button-5>", lambda event: self.scroll_by(3))
+        tree.bind("<Prior>", lambda event: self.scroll_by(-self.visible_rows()))
+        tree.bind("<Next>", lambda event: self.scroll_by(self.visible_rows()))
+        tree.bind("<Destroy>", lambda event: self.close())
+
+    def load(self, path, column=None, term=None):
+        # Start showing a new query; rows arrive from the worker thread
+        self.close()
+        self.column = column
+        self.term = term
+        self.total_rows = None
+        self.top = 0
+        self.cache_start = 0
+        self.cache = []
+        self.pending = None
+        self.results = queue.Queue()
+
+        reader = PageReader(path, column, term)
+        results = self.results
+        self.reader = reader
+        # Timed until the first page is on screen; a replaced load is not recorded
+        self.timing = perf.measure("search_data" if column else "load_all_data")
+        Thread(
+            target=self.read_pages, args=(reader, results), daemon=True
+        ).start()
+        self.set_busy(True)
+        self.refresh()
+        self.poll_id = self.tree.after(self.POLL_MS, self.poll)
+
+    def read_pages(self, reader, results):
+        # Worker thread: never touches Tk, only the results queue
+        try:
+            reader.run(
+                lambda total: results.put(("count", total)),
+                lambda offset, rows: results.put(("page", offset, rows)),
+            )
+        except Exception as e:
+            results.put(("error", str(e)))
+
+    def poll(self):
+        if self.reader is None:
+            return
+        changed = False
+        while True:
+            try:
+                message = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "count":
+                self.total_rows = message[1]
+                if not self.total_rows:
+                    # No page is ever asked for, so an empty result ends here
+                    self.timing.stop(rows=0)
+            elif message[0] == "page":
+                _, offset, rows = message
+                self.cache_start = offset
+                self.cache = rows
+                self.timing.stop(rows=self.total_rows)
+                if self.pending == offset:
+                    self.pending = None
+            else:
+                self.pending = None
+                self.timing.stop(failed=True)
+                messagebox.showerror("Error", f"Failed to load data: {message[1]}")
+            changed = True
+        if changed:
+            self.refresh()
+        self.poll_id = self.tree.after(self.POLL_MS, self.poll)
+
+    def close(self):
+        # Stop this load's poller so a new load never runs alongside it
+        if self.poll_id is not None:
+            self.tree.after_cancel(self.poll_id)
+            self.poll_id = None
+        if self.reader is not None:
+            self.timing.cancel()
+            self.reader.cancel()
+            self.reader = None
+
+    def set_busy(self, busy):
+        if busy == self.busy:
+            return
+        self.busy = busy
+        if busy:
+            self.progress.start(10)
+        else:
+            self.progress.stop()
+
+    def total(self):
+        return self.total_rows or 0
+
+    def visible_rows(self):
+        row_height = int(Style().lookup("Treeview", "rowheight") or 20)
+        # One row's worth of height goes to the headings
+        return max(1, self.tree.winfo_height() // row_height - 1)
+
+    def rows(self, start, count):
+        cache_end = self.cache_start + len(self.cache)
+        wanted_end = min(start + count, self.total())
+        if start < self.cache_start or wanted_end > cache_end:
+            # Ask the worker for a few windows around the requested one and
+            # keep showing what we have until it arrives
+            margin = count * self.PREFETCH_WINDOWS
+            offset = max(0, start - margin)
+            if self.pending != offset and self.reader is not None:
+                self.pending = offset
+                self.reader.request(offset, count + 2 * margin)
+        offset = start - self.cache_start
+        return self.cache[max(0, offset):max(0, offset + count)]
+
+    def refresh(self):
+        visible = self.visible_rows()
+        total = self.total()
+        self.top = max(0, min(self.top, total - visible))
+        rows = self.rows(self.top, visible) if self.total_rows else []
+
+        # Reuse the existing items rather than rebuilding the tree
+        items = self.tree.get_children()
+        for i, row in enumerate(rows):
+            # Skip the first column (ID); amounts are stored in piastres
+            values = money.display_row(row[1:], db.PAYROLL_AMOUNTS)
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert("", "end", values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        loading = self.total_rows is None or self.pending is not None
+        self.set_busy(loading)
+        if self.total_rows is None:
+            self.status_label.config(text="Loading...")
+        elif total:
+            self.status_label.config(
+                text=f"Rows {self.top + 1}-{min(self.top + visible, total)} of {total}")
+        else:
+            self.status_label.config(text="No rows")
+
+    def scroll_by(self, count):
+        self.top += count
+        self.refresh()
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.top = int(float(amount) * self.total())
+            self.refresh()
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self.visible_rows())
+        else:
+            self.scroll_by(int(amount))
+
+    def on_mousewheel(self, event):
+        self.scroll_by(-3 if event.delta > 0 else 3)
+
 
 class PayrollApp:
     def __init__(self, root):
@@ -33,6 +220,12 @@ class PayrollApp:
         # Initialize database
         self.init_database()
         
+        # Status bar with the latest period's totals, packed first so it
+        # keeps its place at the bottom when the window shrinks
+        self.totals_label = Label(self.root, text="", relief="sunken", padding=(10, 2))
+        self.totals_label.pack(side="bottom", fill="x")
+        self.update_status_totals()
+        
         # Main frame
         self.main_frame = Frame(self.root, padding=20)
         self.main_frame.pack(fill="both", expand=True)
@@ -162,12 +355,19 @@ class PayrollApp:
                    "تطوير", "جودة", "فرق الجودة", "حافز", "بدل", "جملة الاجر", "التاريخ")
         
         tree = Treeview(tree_frame, columns=columns, show="headings",
-                            yscrollcommand=y_scrollbar.set,
                             xscrollcommand=x_scrollbar.set)
         
-        # Configure scrollbars
-        y_scrollbar.config(command=tree.yview)
+        # Loading indicator for rows read in the background
+        status_frame = Frame(data_window, padding=(10, 0))
+        status_frame.pack(fill="x", padx=10)
+        load_progress = Progressbar(status_frame, mode="indeterminate", length=120)
+        load_progress.pack(side="left")
+        status_label = Label(status_frame, text="", font=("Helvetica", 10))
+        status_label.pack(side="left", padx=10)
+        
+        # Configure scrollbars; the vertical one pages rows in from the database
         x_scrollbar.config(command=tree.xview)
+        viewer = VirtualTreeview(tree, y_scrollbar, load_progress, status_label)
         
         # Format columns
         for col in columns:
@@ -182,20 +382,9 @@ class PayrollApp:
         
         # Function to refresh tree with all data
         def load_all_data():
-            # Clear the treeview
-            for item in tree.get_children():
-                tree.delete(item)
-            
-            # Fetch all data from the database
-            conn = sqlite3.connect('payroll.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM payroll")
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # Insert rows into the treeview
-            for row in rows:
-                tree.insert("", "end", values=row[1:])  # Skip the first column (ID)
+            # Page through the whole table in the background; only the
+            # visible rows are loaded
+            viewer.load(self.db.path)
         
         # Function to search data
         def search_data():
@@ -221,25 +410,13 @@ class PayrollApp:
                 messagebox.showerror("Error", "Invalid search column selected.")
                 return
             
-            # Clear the treeview
-            for item in tree.get_children():
-                tree.delete(item)
-            
-            # Search in the database
-            conn = sqlite3.connect('payroll.db')
-            cursor = conn.cursor()
-            cursor.execute(f"SELECT * FROM payroll WHERE {db_column} LIKE ?", (f"%{search_term}%",))
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # Insert matching rows into the treeview
-            for row in rows:
-                tree.insert("", "end", values=row[1:])  # Skip the first column (ID)
+            # Search in the database; matches are paged in as the user scrolls
+            viewer.load(self.db.path, db_column, search_term)
         
         # Function to export the current view to Excel
         # Function to export the current view to Excel with vertical orientation
         def export_view_to_excel():
-            if not tree.get_children():
+            if not viewer.total():
                 messagebox.showinfo("Info", "No data to export.")
                 return
             
@@ -254,27 +431,18 @@ class PayrollApp:
                 if not file_path:
                     return  # User cancelled
                 
-                # Get the data from the treeview
-                data = []
-                for item_id in tree.get_children():
-                    data.append(tree.item(item_id)['values'])
+                # Time the export itself, not the file dialog
+                timing = perf.measure("export_view_to_excel")
+                
+                # Import necessary modules
+                from payroll_core.exporters import excel
                 
-                # Create DataFrame with column names
-                df = DataFrame(data, columns=columns)
+                # Stream the current view from the database into the workbook
+                sql, params = db.payroll_query(viewer.column, viewer.term)
+                excel.export_query(self.db.conn, sql, params, file_path, columns,
+                                   skip_columns=1, amounts=db.PAYROLL_AMOUNTS)
                 
-                # Create Excel writer
-                with ExcelWriter(file_path, engine='openpyxl') as writer:
-                    # Write DataFrame to Excel
-                    df.to_excel(writer, index=False, sheet_name="Payroll Data")
-                    
-                    # Get the workbook and worksheet
-                    workbook = writer.book
-                    worksheet = writer.sheets["Payroll Data"]
-                    
-                    # Adjust column widths for better readability
-                    for i, col in enumerate(df.columns):
-                        column_width = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                        worksheet.column_dimensions[openpyxl.utils.get_column_letter(i+1)].width = column_width
+                timing.stop(rows=viewer.total(), path=file_path)
                 
                 messagebox.showinfo("Success", f"Data exported to Excel successfully at {file_path}")
                 
@@ -284,7 +452,7 @@ class PayrollApp:
         # Function to export the current view to PDF with vertical orientation
         # Similarly, update the export_view_to_pdf method in the view_data_from_database function
         def export_view_to_pdf():
-            if not tree.get_children():
+            if not viewer.total():
                 messagebox.showinfo("Info", "No data to export.")
                 return
         
@@ -298,144 +466,31 @@ class PayrollApp:
         
                 if not file_path:
                     return  # User cancelled
-        
+                
+                # Time the export itself, not the file dialog
+                timing = perf.measure("export_view_to_pdf")
+                
                 # Import necessary modules
-                from reportlab.pdfbase import pdfmetrics
-                from reportlab.pdfbase.ttfonts import TTFont
-                from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-                from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-                from reportlab.lib.pagesizes import letter
-                from reportlab.lib.units import inch
-                from reportlab.lib.colors import grey, whitesmoke, beige
-        
-                # Register a font that supports Arabic
-                arabic_font_path = "Amiri-Regular.ttf"
-                pdfmetrics.registerFont(TTFont('Arabic', arabic_font_path))
-                pdfmetrics.registerFontFamily('Arabic', normal='Arabic', bold='Arabic', italic='Arabic', boldItalic='Arabic')
-                # Create styles
-                styles = getSampleStyleSheet()
-        
-                # Create Arabic paragraph style
-                arabic_style = ParagraphStyle(
-                    'Arabic',
-                    parent=styles['Normal'],
-                    fontName='Arabic',
-                    alignment=1,  # Center alignment
-                    fontSize=10
-                )
-        
-                # Function to format Arabic text
-                def format_arabic(text):
-                    reshaped_text = arabic_reshaper.reshape(text)  # Reshape the text
-                    bidi_text = get_display(reshaped_text)  # Reorder for RTL display
-                    return bidi_text
-        
-                # Create PDF with portrait orientation (default)
-                doc = SimpleDocTemplate(file_path, pagesize=letter)
-                elements = []
-        
-                # Add title
-                title = Paragraph("Payroll Data Report", styles['Title'])
-                elements.append(title)
-        
-                date_text = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 
-                                      styles['Normal'])
-                elements.append(date_text)
-                elements.append(Spacer(1, 12))
-        
-                # Calculate column widths based on available space
-                available_width = letter[0] - inch
-                col_width = available_width / 5  # Display 5 columns at a time for readability
-        
-                # Get the data from the treeview
-                data = []
-                for item_id in tree.get_children():
-                    data.append(tree.item(item_id)['values'])
-        
-                # Split columns into logical groups for better readability
-                column_groups = [
-                    columns[0:5],  # Employee info
-                    columns[5:10],  # First set of financial data
-                    columns[10:15],  # Second set of financial data
-                    columns[15:]  # Remaining columns
-                ]
-        
-                group_titles = [
-                    "Employee Information",
-                    "Financial Data (Part 1)",
-                    "Financial Data (Part 2)",
-                    "Additional Data"
-                ]
-        
-                # Create multiple tables for different column groups
-                for group_idx, column_group in enumerate(column_groups):
-                    # Add group title
-                    group_title = Paragraph(group_titles[group_idx], styles['Heading2'])
-                    elements.append(group_title)
-                    elements.append(Spacer(1, 6))
-        
-                    # Extract data for this column group
-                    group_indices = [columns.index(col) for col in column_group]
-        
-                    # Prepare data for table with proper text handling
-                    table_data = []
-        
-                    # Add header row
-                    header_row = []
-                    for col in column_group:
-                        # Check if column name might contain Arabic
-                        if any(ord(c) > 127 for c in col):
-                            header_row.append(Paragraph(format_arabic(col), arabic_style))
-                        else:
-                            header_row.append(Paragraph(col, styles['Normal']))
-                    table_data.append(header_row)
-        
-                    # Add data rows
-                    for row in data:
-                        table_row = []
-                        for i in group_indices:
-                            if i < len(row) and row[i] is not None:
-                                value = str(row[i])
-                                # Check if value might contain Arabic
-                                if any(ord(c) > 127 for c in value):
-                                    table_row.append(Paragraph(format_arabic(value), arabic_style))
-                                else:
-                                    table_row.append(Paragraph(value, styles['Normal']))
-                            else:
-                                table_row.append(Paragraph("", styles['Normal']))
-                        table_data.append(table_row)
-        
-                    # Create table for this group
-                    table = Table(table_data, colWidths=[col_width] * len(column_group))
-        
-                    # Style the table
-                    style = TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), grey),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), whitesmoke),
-                        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 10),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('BACKGROUND', (0, 1), (-1, -1), beige),
-                        ('GRID', (0, 0), (-1, -1), 1, black),
-                        ('FONTSIZE', (0, 1), (-1, -1), 8),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
-                    ])
-        
-                    table.setStyle(style)
-                    elements.append(table)
-                    elements.append(Spacer(1, 12))
-        
-                # Build PDF
-                doc.build(elements)
-        
+                from payroll_core.exporters import pdf
+        
+                # Lay the current view out page by page straight from the database
+                cursor = db.select_payroll(self.db.conn, viewer.column, viewer.term)
+                try:
+                    rows = (money.display_row(row[1:], db.PAYROLL_AMOUNTS)
+                            for row in db.iter_cursor(cursor))
+                    pdf.TableReport(columns).build(file_path, rows)
+                finally:
+                    cursor.close()
+        
+                timing.stop(rows=viewer.total(), path=file_path)
+                
                 messagebox.showinfo("Success", f"Data exported to PDF successfully at {file_path}")
         
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to export to PDF: {str(e)}")
                 
         def export_view_to_word():
-            if not tree.get_children():
+            if not viewer.total():
                 messagebox.showinfo("Info", "No data to export.")
                 return
             
@@ -450,12 +505,11 @@ class PayrollApp:
                 if not file_path:
                     return  # User cancelled
                 
-                # Create Word document
-                doc = Document()
-                doc.add_heading('Payroll Data Report', 0)
+                # Time the export itself, not the file dialog
+                timing = perf.measure("export_view_to_word")
                 
-                # Add current date
-                doc.add_paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                # Import necessary modules
+                from payroll_core.exporters import word
                 
                 # Split columns into logical groups for better readability in portrait mode
                 column_groups = [
@@ -472,41 +526,31 @@ class PayrollApp:
                     "Additional Data"
                 ]
                 
-                # Get data from the treeview
-                data = []
-                for item_id in tree.get_children():
-                    data.append(tree.item(item_id)['values'])
+                groups = []
+                start = 0
+                for group_title, column_group in zip(group_titles, column_groups):
+                    groups.append((group_title, column_group,
+                                   range(start, start + len(column_group))))
+                    start += len(column_group)
                 
-                # Create tables for each column group
-                for group_idx, column_group in enumerate(column_groups):
-                    # Add section heading
-                    doc.add_heading(group_titles[group_idx], level=2)
-                    
-                    # Create table
-                    table = doc.add_table(rows=1, cols=len(column_group))
-                    table.style = 'Table Grid'
-                    
-                    # Add header row
-                    header_cells = table.rows[0].cells
-                    for i, col in enumerate(column_group):
-                        header_cells[i].text = col
-                        header_cells[i].paragraphs[0].runs[0].font.bold = True
-                    
-                    # Add data rows
-                    for row_values in data:
-                        row_cells = table.add_row().cells
-                        for i, col in enumerate(column_group):
-                            col_idx = columns.index(col)
-                            if col_idx < len(row_values) and row_values[col_idx] is not None:
-                                row_cells[i].text = str(row_values[col_idx])
-                            else:
-                                row_cells[i].text = ""
-                    
-                    # Add space after table
-                    doc.add_paragraph()
+                # Stream the current view from the database once per table
+                def view_rows():
+                    cursor = db.select_payroll(self.db.conn, viewer.column, viewer.term)
+                    try:
+                        for row in db.iter_cursor(cursor):
+                            yield money.display_row(row[1:], db.PAYROLL_AMOUNTS)
+                    finally:
+                        cursor.close()
                 
-                # Save document
-                doc.save(file_path)
+                word.write_grouped_tables(
+                    file_path,
+                    'Payroll Data Report',
+                    f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+                    groups,
+                    view_rows,
+                )
+                
+                timing.stop(rows=viewer.total(), path=file_path)
                 
                 messagebox.showinfo("Success", f"Data exported to Word successfully at {file_path}")
                 
@@ -547,7 +591,7 @@ class PayrollApp:
     def create_input_fields(self):
         # Define common departments and job titles for comboboxes
         self.departments = ["جرافيك", "تصوير", "ديكور", "عمارة"]
-        self.job_titles = ["أ.د", "أ.م.د", "د", "م.م", "م"]
+        self.job_titles = self.rate_table.job_titles
         
         # Row 0
         Label(self.entry_frame, text="Name:", font=("Helvetica", 12)).grid(row=0, column=0, padx=10, pady=10, sticky="e")
@@ -587,77 +631,39 @@ class PayrollApp:
         
 
     def init_database(self):
-        conn = sqlite3.connect('payroll.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS payroll (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            employee_id TEXT,
-            employee_name TEXT,
-            department TEXT,
-            job_title TEXT,
-            basic_salary REAL,
-            Social REAL,
-            basic30 REAL,
-            enaa REAL,
-            bhos REAL,
-            ryada REAL,
-            eshraf REAL,
-            maktabia REAL,
-            tatwer REAL,
-            gawda REAL,
-            diff_gawda REAL,
-            hafz REAL,
-            badl REAL,
-            salary REAL,
-            date TEXT
-        )
-        ''')
-        conn.commit()
-        conn.close()
+        # One tuned connection reused by every query in the app
+        self.db = db.Database(db.DB_PATH)
+
+        # Job-title allowances live in the database, compiled once at startup
+        self.rate_cache = rates.RateCache()
+        self.rate_table = self.rate_cache.get(self.db.conn)
+
+    def update_status_totals(self):
+        # Read from the trigger-kept summary table, so this stays instant
+        totals = db.latest_totals(self.db.conn)
+        if totals is None:
+            self.totals_label.config(text="No payroll saved yet")
+            return
+        period, rows, salary = totals
+        self.totals_label.config(
+            text=f"{period}: {rows} records, total salaries {money.format_money(salary)}")
+
     def save_to_database(self):
         if not hasattr(self, 'raw_results'):
             messagebox.showerror("Error", "Calculate payroll first before saving to database.")
             return
         
         try:
-            conn = sqlite3.connect('payroll.db')
-            cursor = conn.cursor()
-            
             # Current date
             current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             # Insert data
-            cursor.execute('''
-            INSERT INTO payroll (
-                employee_id, employee_name, department, job_title, basic_salary, Social, 
-                basic30, enaa, bhos, ryada, 
-                eshraf, maktabia, tatwer, gawda, diff_gawda, hafz, badl, salary, date
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                self.raw_results["employee_id"],
-                self.raw_results["employee_name"],
-                self.raw_results["department"],
-                self.raw_results["job_title"],
-                self.raw_results["basic_salary"],
-                self.raw_results["Social"],
-                self.raw_results["basic30"],
-                self.raw_results["enaa"],
-                self.raw_results["bhos"],
-                self.raw_results["ryada"],
-                self.raw_results["eshraf"],
-                self.raw_results["maktabia"],
-                self.raw_results["tatwer"],
-                self.raw_results["gawda"],
-                self.raw_results["diff_gawda"],
-                self.raw_results["hafz"],
-                self.raw_results["badl"],
-                self.raw_results["salary"],
-                current_date
-            ))
-            
-            conn.commit()
-            conn.close()
+            timing = perf.measure("save_to_database")
+            self.db.execute(db.INSERT_PAYROLL, writer.as_row(self.raw_results, current_date))
+            
+            self.db.commit()
+            timing.stop(rows=1)
+            self.update_status_totals()
             
             messagebox.showinfo("Success", "Payroll data saved to database successfully.")
         except Exception as e:
@@ -666,16 +672,16 @@ class PayrollApp:
 
     def calculate_payroll(self):
         try:
-            result = 0
             # Get values from entries and comboboxes
             employee_name = self.name_entry.get()
             employee_id = self.id_entry.get()
             department = self.department_combo.get()
             job_title = self.job_title_combo.get()
-            basic_salary = float(self.basic_salary_entry.get())
-            social = float(self.social_entry.get())
-            basic30 = float(self.basic30_entry.get())
-            enaa = float(self.enaa.get())
+            # Amounts are read as whole piastres
+            basic_salary = money.to_minor(self.basic_salary_entry.get())
+            social = money.to_minor(self.social_entry.get())
+            basic30 = money.to_minor(self.basic30_entry.get())
+            enaa = money.to_minor(self.enaa.get())
 
             # Validate inputs
             if not employee_name or not employee_id:
@@ -685,111 +691,48 @@ class PayrollApp:
             if not department or not job_title:
                 messagebox.showerror("Error", "Department and job title are required.")
                 return
-            # Calculate payroll
-            result += (basic30 * 0.775)
-            bhos = (basic30 * 0.49)
-            result += bhos
-            ryada = (basic30 * 0.91)
-            result+=ryada
-            eshraf = (basic30 * 1.3)
-            result+= eshraf
-            maktabia = (basic30 * 0.78)
-            result += maktabia
-            tatwer = (basic30 * 0.78)
-            result += tatwer
-            gawda = 0
-            diff_gawda = 0
-            hafz = 0
-            badl = 0
-            exp = 600
-            result += exp
-            mnha = 10
-            result += mnha
-            alawa = 73.90
-            result += alawa
-            tdress = 1071
-            result += tdress
-            if job_title == "أ.د":
-                badl = 3500
-                result+=badl
-                gawda = 4270
-                diff_gawda = 330
-                hafz = 2600
-                result += (gawda + diff_gawda + hafz)
-            elif job_title == "أ.م.د":
-                badl = 3000
-                result+=badl
-                gawda = 3770
-                diff_gawda = 230
-                hafz = 2475
-                result += (gawda + diff_gawda + hafz)
-            elif job_title == "د":
-                badl = 2500
-                result+=badl
-                gawda = 3120
-                diff_gawda = 140
-                hafz = 2050
-                result += (gawda + diff_gawda + hafz)
-            elif job_title == "م.م":
-                badl = 1500
-                result+=badl
-                gawda = 2900
-                diff_gawda = 100
-                hafz = 1850
-                result += (gawda + diff_gawda + hafz)
-            elif job_title == "م":
-                badl = 1000
-                result += badl
-                gawda = 1850
-                diff_gawda = 40
-                hafz = 1850
-                result += (gawda + diff_gawda + hafz)
-            # Store results in dictionary
-            self.results = {
-                "رقم الموظف": employee_id,
-                "الاسم": employee_name,
-                "قسم": department,
-                "الدرجة الوظيفية": job_title,
-                "الاساسى": f"${basic_salary:.2f}",
-                "اجتماعية": f"{social}",
-                "اساسى 30/6/15": f"{basic30}",
-                "اعانة": f"{enaa}%",
-                "بحوث": f"${bhos:.2f}",
-                "ريادة": f"${ryada:.2f}",
-                "اشراف": f"${eshraf:.2f}",
-                "مكتبية": f"${maktabia:.2f}",
-                "تطوير": f"${tatwer:.2f}",
-                "جودة":f"${gawda:.2f}",
-                "فرق الجودة":f"${diff_gawda:.2f}",
-                "حافز":f"${hafz:.2f}",
-                "بدل":f"${badl:.2f}",
-                "جملة الاجر":f"${result:.2f}"
-            }
+            # Pick up any rate changes saved since the last calculation
+            self.rate_table = self.rate_cache.get(self.db.conn)
 
-            # Save raw values for database
-            self.raw_results = {
-                "employee_id": employee_id,
-                "employee_name": employee_name,
-                "department": department,
-                "job_title": job_title,
-                "basic_salary": basic_salary,
-                "Social": social,
-                "basic30": basic30,
-                "enaa": enaa,
-                "bhos":bhos,
-                "ryada": ryada,
-                "eshraf": eshraf,
-                "maktabia": maktabia,
-                "tatwer": tatwer,
-                "gawda": gawda,
-                "diff_gawda": diff_gawda,
-                "hafz": hafz,
-                "badl":badl,
-                "salary":result
-            }
+            # Timed from here so the error dialogs above are not counted
+            with perf.measure("calculate_payroll"):
+                # Calculate payroll; the raw record is what gets saved
+                self.raw_results = engine.calculate_record({
+                    "employee_id": employee_id,
+                    "employee_name": employee_name,
+                    "department": department,
+                    "job_title": job_title,
+                    "basic_salary": basic_salary,
+                    "Social": social,
+                    "basic30": basic30,
+                    "enaa": enaa,
+                }, self.rate_table)
+
+                # Store results in dictionary
+                record = self.raw_results
+                self.results = {
+                    "رقم الموظف": employee_id,
+                    "الاسم": employee_name,
+                    "قسم": department,
+                    "الدرجة الوظيفية": job_title,
+                    "الاساسى": money.format_money(basic_salary, "$"),
+                    "اجتماعية": money.format_money(social),
+                    "اساسى 30/6/15": money.format_money(basic30),
+                    "اعانة": f"{money.format_money(enaa)}%",
+                    "بحوث": money.format_money(record["bhos"], "$"),
+                    "ريادة": money.format_money(record["ryada"], "$"),
+                    "اشراف": money.format_money(record["eshraf"], "$"),
+                    "مكتبية": money.format_money(record["maktabia"], "$"),
+                    "تطوير": money.format_money(record["tatwer"], "$"),
+                    "جودة": money.format_money(record["gawda"], "$"),
+                    "فرق الجودة": money.format_money(record["diff_gawda"], "$"),
+                    "حافز": money.format_money(record["hafz"], "$"),
+                    "بدل": money.format_money(record["badl"], "$"),
+                    "جملة الاجر": money.format_money(record["salary"], "$")
+                }
 
-            # Display results
-            self.display_results()
+                # Display results
+                self.display_results()
 
         except ValueError as e:
             messagebox.showerror("Error", "Please enter valid numeric values for salary, hours, and tax rate.")
@@ -822,7 +765,7 @@ class PayrollApp:
             
     # Modify the export_to_pdf method in the PayrollApp class
     def export_to_pdf(self):
-        if not hasattr(self, 'results'):
+        if not self.results:
             messagebox.showerror("Error", "Calculate payroll first before exporting.")
             return
     
@@ -836,28 +779,20 @@ class PayrollApp:
     
             if not file_path:
                 return  # User cancelled
-    
-            # Import necessary modules and dependencies
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
+            
+            # Time the export itself, not the file dialog
+            timing = perf.measure("export_to_pdf")
+            
+            # Import necessary modules
+            from reportlab.lib.colors import grey, whitesmoke, beige, black
             from reportlab.lib.pagesizes import letter
+            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
             from reportlab.lib.units import inch
-            from reportlab.lib.colors import grey, whitesmoke, beige, black
-            import arabic_reshaper
-            from bidi.algorithm import get_display
-            from datetime import datetime
+            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
+            from payroll_core import fonts, shaping
     
             # Register Arabic font and its family mapping so bold/italic are handled properly
-            arabic_font_path = "Amiri-Regular.ttf"
-            pdfmetrics.registerFont(TTFont('Arabic', arabic_font_path))
-            pdfmetrics.registerFontFamily('Arabic', 
-                normal='Arabic', 
-                bold='Arabic', 
-                italic='Arabic', 
-                boldItalic='Arabic'
-            )
+            fonts.ensure(fonts.ARABIC)
     
             # Create the PDF document
             doc = SimpleDocTemplate(file_path, pagesize=letter)
@@ -885,23 +820,13 @@ class PayrollApp:
             # Header row
             data.append(["Item", "Value"])
     
-            # Function to format Arabic text by reshaping and reordering it for RTL display
-            def format_arabic(text):
-                reshaped_text = arabic_reshaper.reshape(text)
-                bidi_text = get_display(reshaped_text)
-                return bidi_text
-    
             # Add each key/value from results to the table, applying Arabic formatting if needed
             for key, value in self.results.items():
-                if any(ord(c) > 127 for c in key):
-                    key_text = Paragraph(format_arabic(key), arabic_style)
-                else:
-                    key_text = Paragraph(key, styles['Normal'])
+                key_display, key_arabic = shaping.shape(key)
+                key_text = Paragraph(key_display, arabic_style if key_arabic else styles['Normal'])
     
-                if any(ord(c) > 127 for c in value):
-                    value_text = Paragraph(format_arabic(value), arabic_style)
-                else:
-                    value_text = Paragraph(value, styles['Normal'])
+                value_display, value_arabic = shaping.shape(value)
+                value_text = Paragraph(value_display, arabic_style if value_arabic else styles['Normal'])
     
                 data.append([key_text, value_text])
     
@@ -926,6 +851,8 @@ class PayrollApp:
             # Build the PDF
             doc.build(elements)
     
+            timing.stop(rows=1, path=file_path)
+            
             messagebox.showinfo("Success", f"Payroll report exported to PDF successfully at {file_path}")
     
         except Exception as e:
@@ -934,7 +861,7 @@ class PayrollApp:
             
             
     def export_to_excel(self):
-        if not hasattr(self, 'results'):
+        if not self.results:
             messagebox.showerror("Error", "Calculate payroll first before exporting.")
             return
     
@@ -949,23 +876,24 @@ class PayrollApp:
             if not file_path:
                 return  # User cancelled
             
-            # Create DataFrame
-            data = {"Item": [], "Value": []}
-            for key, value in self.results.items():
-                data["Item"].append(key)
-                data["Value"].append(value)
+            # Time the export itself, not the file dialog
+            timing = perf.measure("export_to_excel")
             
-            df = DataFrame(data)
+            # Import necessary modules
+            from payroll_core.exporters import excel
             
             # Write to Excel
-            df.to_excel(file_path, index=False, sheet_name="Payroll Report")
+            excel.write_xlsx(file_path, ["Item", "Value"], self.results.items(),
+                             sheet_name="Payroll Report")
+            
+            timing.stop(rows=1, path=file_path)
             
             messagebox.showinfo("Success", f"Payroll report exported to Excel successfully at {file_path}")
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export to Excel: {str(e)}")
     def export_to_word(self):
-        if not hasattr(self, 'results'):
+        if not self.results:
             messagebox.showerror("Error", "Calculate payroll first before exporting.")
             return
     
@@ -980,6 +908,12 @@ class PayrollApp:
             if not file_path:
                 return  # User cancelled
             
+            # Time the export itself, not the file dialog
+            timing = perf.measure("export_to_word")
+            
+            # Import necessary modules
+            from docx import Document
+            
             # Create Word document
             doc = Document()
             doc.add_heading('Payroll Report', 0)
@@ -1005,6 +939,8 @@ class PayrollApp:
             # Save document
             doc.save(file_path)
             
+            timing.stop(rows=1, path=file_path)
+            
             messagebox.showinfo("Success", f"Payroll report exported to Word successfully at {file_path}")
             
         except Exception as e:
@@ -1014,4 +950,5 @@ class PayrollApp:
 if __name__ == "__main__":
     root = Tk()
     app = PayrollApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.db.close()
\ No newline at end of file
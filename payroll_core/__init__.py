@@ -0,0 +1,6 @@
+"""GUI-free payroll core shared by the Tk and Qt front ends."""
+
+from payroll_core.engine import BASIC30_RATES, FIXED_ADDITIONS, calculate, calculate_batch, calculate_record
+from payroll_core.money import MINOR_UNITS, format_money, to_minor
+from payroll_core.rates import GRADE_COLUMNS, RateCache, RateTable, init_rates, load_rates
+from payroll_core.writer import BulkWriter, WriteStats
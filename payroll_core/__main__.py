@@ -0,0 +1,5 @@
+import sys
+
+from payroll_core.cli import main
+
+sys.exit(main())
@@ -0,0 +1,185 @@
+"""Headless payroll run over a CSV file of employees.
+
+Rows are streamed in fixed-size chunks, computed with the vectorized engine
+and written to the ``payroll`` table, so memory use does not depend on the
+size of the input file. Each run is recorded with per-employee input hashes
+(see ``payroll_core.runs``); employees whose inputs and rates are unchanged
+since the previous run are copied forward instead of recomputed.
+"""
+import csv
+import sqlite3
+import time
+from datetime import datetime
+
+import numpy as np
+
+from payroll_core import db, engine, memtrace, money, rates, runs
+from payroll_core.writer import BulkWriter
+
+# Columns expected in the input CSV header
+INPUT_COLUMNS = (
+    "employee_id", "employee_name", "department", "job_title",
+    "basic_salary", "Social", "basic30", "enaa",
+)
+# Amounts in pounds, read into whole piastres
+NUMERIC_COLUMNS = ("basic_salary", "Social", "basic30", "enaa")
+
+CHUNK_SIZE = 10000
+
+_COMPUTED_COLUMNS = ", ".join(("employee_key",) + db.FACT_COLUMNS[:-1])
+
+# Last run's row for each employee of the chunk whose input hash is the same
+# as in the previous run, re-dated to this run. Unchanged inputs include the
+# employee fields, so the old row's employee key is reused. CROSS JOIN keeps
+# the chunk outermost: each employee is a few index seeks, never a scan of
+# the period.
+COPY_FORWARD = f'''
+INSERT INTO payroll ({_COMPUTED_COLUMNS}, date)
+SELECT {_COMPUTED_COLUMNS}, ? FROM payroll
+WHERE id IN (
+    SELECT MAX(p.id) FROM run_chunk c
+    CROSS JOIN payroll_run_inputs i ON i.run_id = ? AND i.employee_id = c.employee_id
+        AND i.input_hash = c.input_hash
+    CROSS JOIN employees e ON e.employee_id = c.employee_id
+    CROSS JOIN payroll p ON p.employee_key = e.employee_key AND p.date = ?
+    GROUP BY c.employee_id
+)
+'''
+
+# Chunk employees that already have a row in this run, i.e. were copied
+COPIED_IN_CHUNK = '''
+SELECT c.employee_id FROM run_chunk c WHERE EXISTS (
+    SELECT 1 FROM employees e CROSS JOIN payroll p
+        ON p.employee_key = e.employee_key AND p.date = ?
+    WHERE e.employee_id = c.employee_id
+)
+'''
+
+
+def parse_period(period):
+    """Validate a ``YYYY-MM`` period and return its first day as ``YYYY-MM-DD``."""
+    try:
+        return datetime.strptime(period, "%Y-%m").strftime("%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Invalid period {period!r}, expected YYYY-MM") from None
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE, job_titles=None):
+    """Yield lists of at most ``chunk_size`` validated input rows.
+
+    With ``job_titles`` given, a row whose job title is not one of them is
+    rejected rather than computed without grade allowances.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in INPUT_COLUMNS if c not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"{path}: missing columns {', '.join(missing)}")
+
+        chunk = []
+        for row in reader:
+            line = reader.line_num
+            if not row["employee_id"] or not row["employee_name"]:
+                raise ValueError(f"{path}:{line}: employee name and ID are required")
+            if not row["department"] or not row["job_title"]:
+                raise ValueError(f"{path}:{line}: department and job title are required")
+            if job_titles is not None and row["job_title"] not in job_titles:
+                raise ValueError(f"{path}:{line}: unknown job title {row['job_title']!r}")
+            try:
+                for col in NUMERIC_COLUMNS:
+                    row[col] = money.to_minor(row[col])
+            except (TypeError, ValueError):
+                raise ValueError(f"{path}:{line}: {col} must be numeric") from None
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def compute_chunk(chunk, rate_table, date):
+    """Run the payroll formula over one chunk and return rows for INSERT_PAYROLL."""
+    basic30 = np.fromiter((r["basic30"] for r in chunk), dtype=np.int64, count=len(chunk))
+    grades = rate_table.encode([r["job_title"] for r in chunk])
+    c = engine.calculate_batch(basic30, grades, rate_table)
+
+    return zip(
+        [r["employee_id"] for r in chunk],
+        [r["employee_name"] for r in chunk],
+        [r["department"] for r in chunk],
+        [r["job_title"] for r in chunk],
+        [r["basic_salary"] for r in chunk],
+        [r["Social"] for r in chunk],
+        basic30.tolist(),
+        [r["enaa"] for r in chunk],
+        c["bhos"].tolist(), c["ryada"].tolist(), c["eshraf"].tolist(),
+        c["maktabia"].tolist(), c["tatwer"].tolist(), c["gawda"].tolist(),
+        c["diff_gawda"].tolist(), c["hafz"].tolist(), c["badl"].tolist(),
+        c["salary"].tolist(),
+        [date] * len(chunk),
+    )
+
+
+def run_batch(conn, input_path, period, chunk_size=CHUNK_SIZE, full=False):
+    """Compute and store payroll for every employee in ``input_path``.
+
+    Only employees whose input row or rate table changed since the previous
+    period's run are recomputed, unless ``full`` is set. The whole run is
+    one transaction, so a bad row leaves the tables untouched.
+    Returns a ``runs.RunStats``.
+    """
+    first_day = parse_period(period)
+    existing = runs.find_run(conn, period)
+    if existing:
+        raise ValueError(f"Payroll for {period} was already written by run {existing[0]}")
+    rate_table = rates.load_rates(conn, as_of=first_day)
+    date = f"{first_day} 00:00:00"
+    previous = None if full else runs.previous_run(conn, period)
+
+    start = time.perf_counter()
+    writer = BulkWriter(conn, chunk_size)
+    employees = computed = copied = 0
+    conn.execute(runs.CHUNK_SCHEMA)
+    try:
+        run_id = runs.start_run(conn, period, date, rate_table.version)
+        for chunk in read_chunks(input_path, chunk_size, rate_table.codes):
+            ids = [r["employee_id"] for r in chunk]
+            hashes = [runs.input_hash(r, INPUT_COLUMNS, rate_table.version) for r in chunk]
+            try:
+                runs.record_chunk(conn, run_id, zip(ids, hashes))
+            except sqlite3.IntegrityError:
+                repeated = runs.repeated_employee(conn, run_id, ids)
+                raise ValueError(f"{input_path}: employee {repeated} appears more than once") from None
+
+            changed = chunk
+            if previous:
+                copied += conn.execute(COPY_FORWARD, (date, previous[0], previous[1])).rowcount
+                # Anyone whose previous row could not be copied is recomputed
+                done = {row[0] for row in conn.execute(COPIED_IN_CHUNK, (date,))}
+                changed = [r for r in chunk if r["employee_id"] not in done]
+            if changed:
+                computed += writer.write(compute_chunk(changed, rate_table, date), commit=False).rows
+            employees += len(chunk)
+
+        runs.finish_run(conn, run_id, employees, computed, copied)
+        conn.execute("DELETE FROM run_chunk")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return runs.RunStats(run_id, employees, computed, copied, time.perf_counter() - start)
+
+
+def run_command(args):
+    trace = memtrace.begin("run")
+    conn = db.connect(args.db)
+    try:
+        db.init_database(conn)
+        stats = run_batch(conn, args.input, args.period, args.chunk_size, args.full)
+    finally:
+        conn.close()
+    print(f"Wrote payroll for {args.period}: {stats}")
+    if trace is not None:
+        print(trace.stop(stats.employees))
+    return 0
@@ -0,0 +1,365 @@
+"""Benchmarks for the payroll hot paths at growing scale.
+
+Each size gets a fresh database in a temporary directory, filled with
+synthetic employees: Arabic names, the front ends' departments and the
+seeded job titles. The calculation, inserts, searches, grid loading and the
+three view exports are timed on it, and the results are written as JSON.
+Given an earlier results file as a baseline, every timing is compared with
+its match there and slowdowns beyond a tolerance are reported.
+
+With memory tracing on (``--trace-memory``), each benchmark's peak memory
+is added to its result; tracing slows allocation, so those timings are
+not comparable with untraced ones.
+
+Exports write at most ``export_rows`` rows (all of them when 0), since a
+million-row PDF says little more than a ten-thousand-row one and takes
+hours; the query still runs against the full-size database.
+"""
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from payroll_core import db, engine, memtrace, rates
+from payroll_core.money import display_row
+from payroll_core.reports import parse_list
+from payroll_core.writer import BulkWriter
+
+SIZES = (1000, 10000, 100000, 1000000)
+
+# Rows each view export writes by default
+EXPORT_ROWS = 10000
+
+# Records saved one transaction at a time, as the Save button does
+SAVE_ROWS = 1000
+
+# Rows per grid page, as the front ends request them
+PAGE_ROWS = 500
+
+# Allowed slowdown against the baseline before a timing counts as a regression
+TOLERANCE = 0.25
+
+# Timings shorter than this are mostly noise and never count as regressions
+NOISE_FLOOR = 0.05
+
+# The departments offered by both front ends
+DEPARTMENTS = ["جرافيك", "تصوير", "ديكور", "عمارة"]
+
+FIRST_NAMES = (
+    "محمد", "أحمد", "محمود", "مصطفى", "علي", "حسن", "حسين", "إبراهيم", "يوسف", "عمر",
+    "خالد", "طارق", "سامي", "كريم", "هشام", "عمرو", "فاطمة", "مريم", "نور", "سارة",
+    "هدى", "منى", "ياسمين", "ريم", "دينا", "سلمى", "آية", "رنا", "هبة", "ليلى",
+)
+
+FATHER_NAMES = FIRST_NAMES[:16]
+
+FAMILY_NAMES = (
+    "عبد الله", "عبد الرحمن", "السيد", "إبراهيم", "حسن", "الشريف", "النجار", "المصري",
+    "سليمان", "عثمان", "منصور", "فتحي", "رمضان", "عبد العزيز", "الخولي", "زكي",
+    "شاكر", "بدوي", "القاضي", "حجازي",
+)
+
+# Payroll date given to every generated row
+DATE = "2026-01-28 00:00:00"
+
+
+def generate_employees(n, seed=0, job_titles=None):
+    """``n`` employees as ``(id, name, department, job_title, basic_salary,
+    Social, basic30, enaa)`` tuples, amounts in piastres.
+
+    The same ``seed`` always gives the same employees.
+    """
+    job_titles = job_titles or rates.default_rates().job_titles
+    rng = random.Random(seed)
+    employees = []
+    for i in range(n):
+        name = (f"{rng.choice(FIRST_NAMES)} {rng.choice(FATHER_NAMES)} "
+                f"{rng.choice(FAMILY_NAMES)}")
+        basic_salary = rng.randrange(300000, 1500000, 100)
+        employees.append((
+            f"E{i + 1:07d}", name, rng.choice(DEPARTMENTS), rng.choice(job_titles),
+            basic_salary, rng.randrange(0, 20000, 100),
+            basic_salary * rng.randrange(50, 80) // 100, rng.randrange(0, 3000, 100),
+        ))
+    return employees
+
+
+def payroll_rows(employees, table, date=DATE):
+    """Full rows in ``db.PAYROLL_COLUMNS`` order for ``employees``."""
+    basic30 = np.fromiter((e[6] for e in employees), dtype=np.int64, count=len(employees))
+    components = engine.calculate_batch(basic30, table.encode([e[3] for e in employees]), table)
+    computed = zip(*(components[col].tolist() for col in db.FACT_COLUMNS[4:-1]))
+    return [employee + tuple(values) + (date,) for employee, values in zip(employees, computed)]
+
+
+class Workload:
+    """One size's employees, rows and database, shared by the benchmarks."""
+
+    def __init__(self, size, directory, export_rows=EXPORT_ROWS, seed=0):
+        self.size = size
+        self.directory = directory
+        self.path = os.path.join(directory, "payroll.db")
+        self.conn = db.connect(self.path)
+        db.init_database(self.conn)
+        self.table = rates.load_rates(self.conn)
+        self.employees = generate_employees(size, seed, self.table.job_titles)
+        self.rows = payroll_rows(self.employees, self.table)
+        self.export_rows = min(size, export_rows) if export_rows else size
+
+    def output(self, name):
+        return os.path.join(self.directory, name)
+
+    def export_query(self):
+        sql, params = db.payroll_query()
+        return f"{sql} LIMIT {self.export_rows}", params
+
+    def close(self):
+        self.conn.close()
+
+
+# Each benchmark returns ``(rows, bytes_written)``; bytes are None when
+# nothing is written to a file
+
+def bench_calculate(work):
+    # The per-employee formula behind calculate_payroll
+    for employee in work.employees:
+        engine.calculate(employee[6], employee[3], work.table)
+    return len(work.employees), None
+
+
+def bench_calculate_batch(work):
+    basic30 = np.array([e[6] for e in work.employees], dtype=np.int64)
+    grades = work.table.encode([e[3] for e in work.employees])
+    engine.calculate_batch(basic30, grades, work.table)
+    return len(work.employees), None
+
+
+def bench_save(work):
+    # One insert and commit per record, like save_to_database
+    conn = db.connect(work.output("save.db"))
+    try:
+        db.init_database(conn)
+        rows = work.rows[:SAVE_ROWS]
+        for row in rows:
+            conn.execute(db.INSERT_PAYROLL, row)
+            conn.commit()
+    finally:
+        conn.close()
+    return len(rows), None
+
+
+def bench_insert(work):
+    stats = BulkWriter(work.conn).write(work.rows)
+    return stats.rows, None
+
+
+def bench_search(work):
+    # Count and first page for a search on each column, as search_data shows them
+    middle = work.employees[len(work.employees) // 2]
+    searches = (
+        ("employee_id", middle[0]),
+        ("employee_name", middle[1].split()[0]),
+        ("department", middle[2]),
+        ("job_title", middle[3]),
+    )
+    rows = 0
+    for column, term in searches:
+        pager = db.payroll_pager(work.conn, column, term)
+        pager.count()
+        rows += len(pager.page(0, PAGE_ROWS))
+    return rows, None
+
+
+def bench_load_grid(work):
+    # Count, first page, then scrolling through every row to the end
+    pager = db.payroll_pager(work.conn)
+    pager.count()
+    pager.page(0, PAGE_ROWS)
+    cursor = db.select_payroll(work.conn)
+    try:
+        rows = sum(1 for _ in db.iter_cursor(cursor))
+    finally:
+        cursor.close()
+    return rows, None
+
+
+def _view_rows(work):
+    sql, params = work.export_query()
+    cursor = work.conn.execute(sql, params)
+    try:
+        for row in db.iter_cursor(cursor):
+            yield display_row(row[1:], db.PAYROLL_AMOUNTS)
+    finally:
+        cursor.close()
+
+
+def bench_export_excel(work):
+    from payroll_core.exporters import excel
+    path = work.output("view.xlsx")
+    sql, params = work.export_query()
+    rows = excel.export_query(work.conn, sql, params, path, db.PAYROLL_COLUMNS,
+                              skip_columns=1, amounts=db.PAYROLL_AMOUNTS)
+    return rows, os.path.getsize(path)
+
+
+def bench_export_pdf(work):
+    from payroll_core.exporters import pdf
+    path = work.output("view.pdf")
+    rows = pdf.TableReport(db.PAYROLL_COLUMNS).build(path, _view_rows(work))
+    return rows, os.path.getsize(path)
+
+
+def bench_export_word(work):
+    from payroll_core.exporters import word
+    path = work.output("view.docx")
+    columns = db.PAYROLL_COLUMNS
+    groups = [(f"Columns {start + 1}-{end}", columns[start:end], range(start, end))
+              for start, end in ((0, 5), (5, 10), (10, 15), (15, len(columns)))]
+    word.write_grouped_tables(path, "Payroll Data Report", DATE, groups,
+                              lambda: _view_rows(work))
+    return work.export_rows, os.path.getsize(path)
+
+
+# Benchmarks in the order they run; insert fills the database the later ones read
+BENCHMARKS = {
+    "calculate": bench_calculate,
+    "calculate_batch": bench_calculate_batch,
+    "save": bench_save,
+    "insert": bench_insert,
+    "search": bench_search,
+    "load_grid": bench_load_grid,
+    "export_view_to_excel": bench_export_excel,
+    "export_view_to_pdf": bench_export_pdf,
+    "export_view_to_word": bench_export_word,
+}
+
+
+def run_size(size, names=tuple(BENCHMARKS), export_rows=EXPORT_ROWS, seed=0, out=sys.stdout):
+    """Run the ``names`` benchmarks on ``size`` employees; returns result dicts.
+
+    A benchmark that fails (a missing font, say) is recorded with its error
+    and the rest still run.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="payroll-bench-") as directory:
+        work = Workload(size, directory, export_rows, seed)
+        try:
+            # Searches and exports need rows even when insert is not timed
+            if "insert" not in names:
+                BulkWriter(work.conn).write(work.rows)
+            for name in names:
+                result = {"name": name, "size": size}
+                trace = memtrace.begin(f"bench {name}")
+                start = time.perf_counter()
+                try:
+                    rows, written = BENCHMARKS[name](work)
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                    if trace is not None:
+                        trace.cancel()
+                else:
+                    result.update(rows=rows, seconds=time.perf_counter() - start, bytes=written)
+                    if trace is not None:
+                        result["peak_memory"] = trace.stop(rows).peak
+                results.append(result)
+                print(format_result(result), file=out, flush=True)
+        finally:
+            work.close()
+    return results
+
+
+def run(sizes=SIZES, names=tuple(BENCHMARKS), export_rows=EXPORT_ROWS, seed=0, out=sys.stdout):
+    """Every benchmark at every size, with the environment they ran in."""
+    results = []
+    for size in sizes:
+        results += run_size(size, names, export_rows, seed, out)
+    return {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "export_rows": export_rows,
+        "results": results,
+    }
+
+
+def format_result(result):
+    label = f"{result['name']:<22} {result['size']:>9,}"
+    if "error" in result:
+        return f"{label}  error: {result['error']}"
+    seconds, rows = result["seconds"], result["rows"]
+    rate = f"{rows / seconds:>12,.0f} rows/s" if seconds else ""
+    written = f"  {result['bytes'] / 1e6:8.1f}MB" if result.get("bytes") else ""
+    if "peak_memory" in result:
+        written += f"  peak {result['peak_memory'] / 1e6:.1f}MB"
+    return f"{label}  {rows:>9,} rows {seconds:9.3f}s {rate}{written}"
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """``(lines, regressions)`` comparing ``results`` with ``baseline`` run data.
+
+    Timings are matched by benchmark, size and row count; one slower than
+    its baseline by more than ``tolerance`` (a fraction) is a regression,
+    unless it still took less than NOISE_FLOOR seconds.
+    """
+    before = {(r["name"], r["size"], r.get("rows")): r["seconds"]
+              for r in baseline["results"] if "seconds" in r}
+    lines, regressions = [], []
+    for result in results["results"]:
+        key = (result["name"], result["size"], result.get("rows"))
+        if "seconds" not in result or not before.get(key):
+            continue
+        ratio = result["seconds"] / before[key]
+        line = (f"{result['name']:<22} {result['size']:>9,}  {before[key]:9.3f}s -> "
+                f"{result['seconds']:9.3f}s  x{ratio:.2f}")
+        if ratio > 1 + tolerance and result["seconds"] >= NOISE_FLOOR:
+            line += "  REGRESSION"
+            regressions.append(result)
+        lines.append(line)
+    return lines, regressions
+
+
+def _parse_sizes(text):
+    try:
+        sizes = tuple(int(size) for size in text.split(",") if size.strip())
+    except ValueError:
+        raise ValueError(f"Invalid sizes {text!r}, expected numbers like 1000,10000") from None
+    if not sizes or min(sizes) < 1:
+        raise ValueError(f"Invalid sizes {text!r}, expected numbers like 1000,10000")
+    return sizes
+
+
+def run_command(args):
+    sizes = _parse_sizes(args.sizes)
+    names = parse_list(args.only, BENCHMARKS, "benchmark") if args.only else tuple(BENCHMARKS)
+    if args.font:
+        from payroll_core import fonts
+        fonts.configure(fonts.ARABIC, args.font)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = run(sizes, names, args.export_rows, args.seed)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {len(results['results'])} results to {args.out}")
+
+    if baseline is None:
+        return 0
+    lines, regressions = compare(results, baseline, args.tolerance)
+    print(f"\nAgainst {args.baseline} (tolerance {args.tolerance:.0%}):")
+    for line in lines:
+        print(line)
+    if regressions:
+        print(f"{len(regressions)} regression(s)", file=sys.stderr)
+        return 1
+    print("no regressions")
+    return 0
@@ -0,0 +1,99 @@
+"""Command-line entry point: ``python -m payroll <command>``.
+
+Nothing here imports Tk or Qt, so every command runs on a headless machine.
+"""
+import argparse
+import sqlite3
+import sys
+
+from payroll_core import batch, bench, db, memtrace, payslips, perf, reports, startup
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m payroll", description="Payroll batch tools")
+    parser.add_argument("--db", default=db.DB_PATH, help="path to the payroll database")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help=f"trace peak memory of runs, payslips and benchmarks into {memtrace.MEMTRACE_LOG}")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="compute payroll for every employee in a CSV file")
+    run.add_argument("--input", required=True, help="CSV file with one employee per row")
+    run.add_argument("--period", required=True, help="payroll period as YYYY-MM")
+    run.add_argument("--chunk-size", type=int, default=batch.CHUNK_SIZE,
+                     help="rows held in memory at a time")
+    run.add_argument("--full", action="store_true",
+                     help="recompute every employee instead of only changed inputs")
+    run.set_defaults(handler=batch.run_command)
+
+    slips = commands.add_parser("payslips", help="render a payslip for every employee in a period")
+    slips.add_argument("--period", required=True, help="payroll period as YYYY-MM")
+    output = slips.add_mutually_exclusive_group(required=True)
+    output.add_argument("--out-dir", help="write one PDF per employee into this directory")
+    output.add_argument("--merged", help="write every payslip into this one PDF")
+    slips.add_argument("--workers", type=int, default=None,
+                       help="worker processes (default: one per CPU)")
+    slips.add_argument("--chunk-size", type=int, default=payslips.CHUNK_SIZE,
+                       help="employees rendered per worker task")
+    slips.set_defaults(handler=payslips.run_command)
+
+    report = commands.add_parser("report", help="totals, averages and row counts per group")
+    report.add_argument("--by", default="department",
+                        help="comma-separated groupings: " + ", ".join(reports.GROUPINGS))
+    report.add_argument("--from", dest="first", help="first payroll period as YYYY-MM")
+    report.add_argument("--to", dest="last", help="last payroll period as YYYY-MM")
+    report.add_argument("--columns", default=",".join(db.REPORT_COLUMNS),
+                        help="comma-separated amount columns to total")
+    report.add_argument("--headcount", action="store_true",
+                        help="also count distinct employees (scans payroll instead of the summary)")
+    report.add_argument("--csv", help="write the report to this CSV file instead of printing it")
+    report.set_defaults(handler=reports.run_command)
+
+    timing = commands.add_parser("bench", help="time the hot paths on synthetic payroll data")
+    timing.add_argument("--sizes", default=",".join(str(size) for size in bench.SIZES),
+                        help="comma-separated employee counts")
+    timing.add_argument("--only", help="comma-separated benchmarks: " + ", ".join(bench.BENCHMARKS))
+    timing.add_argument("--export-rows", type=int, default=bench.EXPORT_ROWS,
+                        help="rows each view export writes (0 for all)")
+    timing.add_argument("--seed", type=int, default=0, help="seed for the generated employees")
+    timing.add_argument("--font", help="Arabic TTF font for the PDF export")
+    timing.add_argument("--out", default="bench-results.json", help="JSON file for the results")
+    timing.add_argument("--baseline", help="earlier results file to compare against")
+    timing.add_argument("--tolerance", type=float, default=bench.TOLERANCE,
+                        help="allowed slowdown against the baseline, as a fraction")
+    timing.set_defaults(handler=bench.run_command)
+
+    timings = commands.add_parser("perf", help="percentiles of the timings the front ends recorded")
+    timings.add_argument("--store", default=perf.PERF_PATH, help="path to the timings file")
+    timings.add_argument("--clear", action="store_true", help="delete every recorded timing")
+    timings.set_defaults(handler=perf.run_command)
+
+    memory = commands.add_parser("memory", help="peak-memory reports from traced operations")
+    memory.add_argument("--log", default=memtrace.MEMTRACE_LOG, help="path to the memory log")
+    memory.add_argument("--operation", help="only reports for this operation")
+    memory.add_argument("--last", type=int, default=20, help="how many recent reports to list")
+    memory.add_argument("--sites", action="store_true", help="also list the top allocation sites")
+    memory.add_argument("--clear", action="store_true", help="delete the memory log")
+    memory.set_defaults(handler=memtrace.run_command)
+
+    check = commands.add_parser("startup", help="report front-end import time against a budget")
+    check.add_argument("--front", choices=sorted(startup.FRONT_ENDS), default="tk",
+                       help="front end to measure")
+    check.add_argument("--budget", type=float, default=startup.STARTUP_BUDGET,
+                       help="seconds allowed before the main window is up")
+    check.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    check.add_argument("--window", action="store_true",
+                       help="also time launch to the first window (needs a display)")
+    check.set_defaults(handler=startup.run_command)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace_memory:
+        memtrace.enable()
+    try:
+        return args.handler(args)
+    except (OSError, ValueError, RuntimeError, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
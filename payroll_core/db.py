@@ -0,0 +1,584 @@
+"""Schema and statements for the payroll database."""
+import sqlite3
+
+from payroll_core import rates, runs
+from payroll_core.paging import RowPager
+
+DB_PATH = 'payroll.db'
+
+PAYROLL_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS payroll (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id TEXT,
+    employee_name TEXT,
+    department TEXT,
+    job_title TEXT,
+    basic_salary REAL,
+    Social REAL,
+    basic30 REAL,
+    enaa REAL,
+    bhos REAL,
+    ryada REAL,
+    eshraf REAL,
+    maktabia REAL,
+    tatwer REAL,
+    gawda REAL,
+    diff_gawda REAL,
+    hafz REAL,
+    badl REAL,
+    salary REAL,
+    date TEXT
+)
+'''
+
+# Column order shared by INSERT_PAYROLL and every writer
+PAYROLL_COLUMNS = (
+    "employee_id", "employee_name", "department", "job_title", "basic_salary", "Social",
+    "basic30", "enaa", "bhos", "ryada",
+    "eshraf", "maktabia", "tatwer", "gawda", "diff_gawda", "hafz", "badl", "salary", "date",
+)
+
+# Columns that describe the employee rather than one calculation
+EMPLOYEE_COLUMNS = PAYROLL_COLUMNS[:4]
+
+# Everything else, stored per calculation in the payroll table
+FACT_COLUMNS = PAYROLL_COLUMNS[4:]
+
+# Amounts, stored as whole piastres (see payroll_core.money)
+MONEY_COLUMNS = FACT_COLUMNS[:-1]
+
+# Whether each of PAYROLL_COLUMNS holds an amount
+PAYROLL_AMOUNTS = tuple(col in MONEY_COLUMNS for col in PAYROLL_COLUMNS)
+
+# Amounts computed by the engine, without the salary they add up to
+ALLOWANCE_COLUMNS = FACT_COLUMNS[4:-2]
+
+# Amounts the grouped reports total and average
+REPORT_COLUMNS = ("salary",) + ALLOWANCE_COLUMNS
+
+# PAYROLL_SCHEMA above is the original single-table layout; the
+# normalizing migration splits it into an employees master table and a
+# slim payroll table that points at it by key. Each distinct combination
+# of employee fields gets its own key, so old rows keep the name,
+# department and job title they were calculated under.
+EMPLOYEES_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS employees (
+    employee_key INTEGER PRIMARY KEY,
+    employee_id TEXT NOT NULL,
+    employee_name TEXT NOT NULL,
+    department TEXT NOT NULL,
+    job_title TEXT NOT NULL,
+    UNIQUE (employee_id, employee_name, department, job_title)
+)
+'''
+
+# ``{table}`` is payroll, or the staging table while migrating. Amounts
+# are ``{money}``: REAL pounds as first split out, INTEGER piastres since.
+PAYROLL_FACTS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS {table} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_key INTEGER NOT NULL REFERENCES employees(employee_key),
+    basic_salary {money},
+    Social {money},
+    basic30 {money},
+    enaa {money},
+    bhos {money},
+    ryada {money},
+    eshraf {money},
+    maktabia {money},
+    tatwer {money},
+    gawda {money},
+    diff_gawda {money},
+    hafz {money},
+    badl {money},
+    salary {money},
+    date TEXT
+)
+'''
+
+# The old wide row layout, joined back together for reading and writing.
+# Rows come out as ``id`` followed by PAYROLL_COLUMNS, like ``SELECT *``
+# on the original table did.
+PAYROLL_VIEW = f'''
+CREATE VIEW IF NOT EXISTS payroll_rows AS
+SELECT p.id AS id, {", ".join(f"e.{col} AS {col}" for col in EMPLOYEE_COLUMNS)},
+    {", ".join(f"p.{col} AS {col}" for col in FACT_COLUMNS)}, e.employee_key AS employee_key
+FROM payroll p JOIN employees e ON e.employee_key = p.employee_key
+'''
+
+_EMPLOYEE_MATCH = " AND ".join(f"{col} = COALESCE(NEW.{col}, '')" for col in EMPLOYEE_COLUMNS)
+
+# Inserting a wide row into the view files the employee fields under their
+# key, adding the employee the first time that combination is seen. Used by
+# single-row saves; bulk writes go through insert_rows below.
+PAYROLL_INSERT_TRIGGER = f'''
+CREATE TRIGGER IF NOT EXISTS payroll_rows_insert INSTEAD OF INSERT ON payroll_rows
+BEGIN
+    INSERT OR IGNORE INTO employees ({", ".join(EMPLOYEE_COLUMNS)})
+    VALUES ({", ".join(f"COALESCE(NEW.{col}, '')" for col in EMPLOYEE_COLUMNS)});
+    INSERT INTO payroll (employee_key, {", ".join(FACT_COLUMNS)})
+    VALUES ((SELECT employee_key FROM employees WHERE {_EMPLOYEE_MATCH}),
+            {", ".join(f"NEW.{col}" for col in FACT_COLUMNS)});
+END
+'''
+
+INSERT_PAYROLL = f'''
+INSERT INTO payroll_rows ({", ".join(PAYROLL_COLUMNS)})
+VALUES ({", ".join("?" * len(PAYROLL_COLUMNS))})
+'''
+
+# Bulk writes skip the view trigger, which files one row at a time: a batch
+# of wide rows is staged, its new employees are added in one statement, and
+# its facts go into payroll in another with the keys resolved by a join
+STAGED_ROWS_SCHEMA = f'''
+CREATE TEMP TABLE IF NOT EXISTS staged_rows ({", ".join(PAYROLL_COLUMNS)})
+'''
+
+INSERT_STAGED = f'''
+INSERT INTO staged_rows ({", ".join(PAYROLL_COLUMNS)})
+VALUES ({", ".join("?" * len(PAYROLL_COLUMNS))})
+'''
+
+STAGE_EMPLOYEES = f'''
+INSERT OR IGNORE INTO employees ({", ".join(EMPLOYEE_COLUMNS)})
+SELECT {", ".join(f"COALESCE({col}, '')" for col in EMPLOYEE_COLUMNS)} FROM staged_rows
+'''
+
+# CROSS JOIN keeps staged_rows outermost, so each row is one seek of the
+# employees unique index, and rows keep their staging order
+STAGE_FACTS = f'''
+INSERT INTO payroll (employee_key, {", ".join(FACT_COLUMNS)})
+SELECT e.employee_key, {", ".join(f"s.{col}" for col in FACT_COLUMNS)}
+FROM staged_rows s CROSS JOIN employees e
+    ON {" AND ".join(f"e.{col} = COALESCE(s.{col}, '')" for col in EMPLOYEE_COLUMNS)}
+ORDER BY s.rowid
+'''
+
+
+def insert_rows(conn, rows):
+    """Insert wide rows in PAYROLL_COLUMNS order straight into payroll.
+
+    Set-wise equivalent of running INSERT_PAYROLL per row, for batches;
+    runs in the caller's transaction.
+    """
+    conn.execute(STAGED_ROWS_SCHEMA)
+    conn.executemany(INSERT_STAGED, rows)
+    try:
+        conn.execute(STAGE_EMPLOYEES)
+        conn.execute(STAGE_FACTS)
+    finally:
+        conn.execute("DELETE FROM staged_rows")
+
+
+# What grids and exporters read: the id, then every display column
+PAYROLL_SELECT_COLUMNS = "id, " + ", ".join(PAYROLL_COLUMNS)
+PAYROLL_SELECT = f"SELECT {PAYROLL_SELECT_COLUMNS} FROM payroll_rows"
+
+
+# Connection tuning: WAL lets readers run alongside the writer, NORMAL sync
+# is durable under WAL except on power loss, and the page cache and memory
+# map keep the working set out of the OS read path.
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -64000),  # negative means KiB, so ~64 MB
+    ("mmap_size", 256 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+)
+
+# Prepared statements kept per connection, keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+# Rows read per fetchmany() when streaming a cursor
+FETCH_SIZE = 2000
+
+
+def connect(path=DB_PATH):
+    conn = sqlite3.connect(path, cached_statements=STATEMENT_CACHE_SIZE)
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+# Secondary indexes for the search and history paths. employee_id lookups
+# use the leftmost column of (employee_id, date), so it needs no index of
+# its own.
+PAYROLL_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_payroll_employee_date ON payroll (employee_id, date)",
+    "CREATE INDEX IF NOT EXISTS idx_payroll_department_date ON payroll (department, date)",
+    "CREATE INDEX IF NOT EXISTS idx_payroll_job_title_date ON payroll (job_title, date)",
+    "CREATE INDEX IF NOT EXISTS idx_payroll_employee_name ON payroll (employee_name)",
+    "CREATE INDEX IF NOT EXISTS idx_payroll_date ON payroll (date)",
+)
+
+
+def _add_payroll_indexes(conn):
+    for statement in PAYROLL_INDEXES:
+        conn.execute(statement)
+
+
+# Indexes once employee fields live in their own table. Searches find the
+# matching employees through these, then seek payroll by employee key.
+NORMALIZED_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_employees_id ON employees (employee_id)",
+    "CREATE INDEX IF NOT EXISTS idx_employees_name ON employees (employee_name)",
+    "CREATE INDEX IF NOT EXISTS idx_employees_department ON employees (department)",
+    "CREATE INDEX IF NOT EXISTS idx_employees_job_title ON employees (job_title)",
+    "CREATE INDEX IF NOT EXISTS idx_payroll_key_date ON payroll (employee_key, date)",
+    "CREATE INDEX IF NOT EXISTS idx_payroll_date ON payroll (date)",
+)
+
+# Old payroll rows moved per committed batch by the normalizing migration
+MIGRATION_BATCH = 50000
+
+_WIDE_EMPLOYEE = ", ".join(f"COALESCE({col}, '')" for col in EMPLOYEE_COLUMNS)
+
+COPY_EMPLOYEES = f'''
+INSERT OR IGNORE INTO employees ({", ".join(EMPLOYEE_COLUMNS)})
+SELECT {_WIDE_EMPLOYEE} FROM payroll WHERE id > ? AND id <= ? ORDER BY id
+'''
+
+COPY_FACTS = f'''
+INSERT INTO payroll_facts (id, employee_key, {", ".join(FACT_COLUMNS)})
+SELECT p.id, e.employee_key, {", ".join(f"p.{col}" for col in FACT_COLUMNS)}
+FROM payroll p JOIN employees e
+    ON {" AND ".join(f"e.{col} = COALESCE(p.{col}, '')" for col in EMPLOYEE_COLUMNS)}
+WHERE p.id > ? AND p.id <= ?
+'''
+
+
+def _table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _copy_in_batches(conn, statements, staging):
+    """Run ``statements`` over payroll's id ranges not yet in ``staging``.
+
+    Each statement takes ``(after_id, last_id)``; every batch of
+    MIGRATION_BATCH rows is committed, so an interrupted copy resumes
+    after the last id it reached.
+    """
+    last = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {staging}").fetchone()[0]
+    while True:
+        end = conn.execute(
+            "SELECT MAX(id) FROM (SELECT id FROM payroll WHERE id > ? ORDER BY id LIMIT ?)",
+            (last, MIGRATION_BATCH)
+        ).fetchone()[0]
+        if end is None:
+            return
+        for statement in statements:
+            conn.execute(statement, (last, end))
+        conn.commit()
+        last = end
+
+
+def _replace_payroll(conn, staging):
+    """Swap ``staging`` in for payroll, keeping AUTOINCREMENT from reusing
+    ids of rows deleted earlier. Leaves the transaction open."""
+    conn.execute("BEGIN")
+    sequence = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'payroll'").fetchone()
+    conn.execute("DROP VIEW IF EXISTS payroll_rows")
+    conn.execute("DROP TABLE payroll")
+    conn.execute(f"ALTER TABLE {staging} RENAME TO payroll")
+    if sequence is not None:
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'payroll'",
+                     sequence)
+
+
+def _create_payroll_access(conn):
+    # Indexes, view and insert trigger over the normalized payroll table
+    for statement in NORMALIZED_INDEXES:
+        conn.execute(statement)
+    conn.execute(PAYROLL_VIEW)
+    conn.execute(PAYROLL_INSERT_TRIGGER)
+
+
+def _normalize_employees(conn):
+    """Split the wide payroll table into employees and a slim payroll table.
+
+    Rows are copied into a staging table in batches, so a large file never
+    needs one huge transaction, and the old table is swapped out only once
+    everything has been copied.
+    """
+    conn.execute(EMPLOYEES_SCHEMA)
+    if "employee_name" in _table_columns(conn, "payroll"):
+        conn.execute(PAYROLL_FACTS_SCHEMA.format(table="payroll_facts", money="REAL"))
+        conn.commit()
+        _copy_in_batches(conn, (COPY_EMPLOYEES, COPY_FACTS), "payroll_facts")
+        _replace_payroll(conn, "payroll_facts")
+    else:
+        conn.execute(PAYROLL_FACTS_SCHEMA.format(table="payroll", money="REAL"))
+    _create_payroll_access(conn)
+
+
+COPY_MINOR_UNITS = f'''
+INSERT INTO payroll_minor (id, employee_key, {", ".join(FACT_COLUMNS)})
+SELECT id, employee_key, {", ".join(f"CAST(ROUND({col} * 100) AS INTEGER)" for col in MONEY_COLUMNS)}, date
+FROM payroll WHERE id > ? AND id <= ?
+'''
+
+
+def _store_minor_units(conn):
+    """Turn REAL pound amounts into INTEGER piastres, rounding to the nearest.
+
+    Payroll rows are copied in batches like ``_normalize_employees``; the
+    small rates table is rebuilt inside the final swap.
+    """
+    types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(payroll)")}
+    if types.get("salary") == "REAL":
+        conn.execute(PAYROLL_FACTS_SCHEMA.format(table="payroll_minor", money="INTEGER"))
+        conn.commit()
+        _copy_in_batches(conn, (COPY_MINOR_UNITS,), "payroll_minor")
+        _replace_payroll(conn, "payroll_minor")
+        _create_payroll_access(conn)
+    elif not conn.in_transaction:
+        conn.execute("BEGIN")
+    rates.convert_to_minor_units(conn)
+
+
+# Covering index for payroll_core.reports: it holds every column a report
+# reads, and a period filter is one range of it. Its leading date column
+# also serves everything the plain date index did.
+REPORT_INDEX = f'''
+CREATE INDEX IF NOT EXISTS idx_payroll_report
+ON payroll (date, employee_key, {", ".join(REPORT_COLUMNS)})
+'''
+
+
+def _add_report_index(conn):
+    conn.execute(REPORT_INDEX)
+    conn.execute("DROP INDEX IF EXISTS idx_payroll_date")
+
+
+# Running totals per period, department and job title, kept current by the
+# triggers below so totals screens read a handful of rows instead of
+# scanning payroll. Missing amounts count as zero.
+SUMMARY_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS payroll_summary (
+    period TEXT NOT NULL,
+    department TEXT NOT NULL,
+    job_title TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    {", ".join(f"{col} INTEGER NOT NULL" for col in REPORT_COLUMNS)},
+    PRIMARY KEY (period, department, job_title)
+) WITHOUT ROWID
+'''
+
+
+def _summary_period(date):
+    return f"COALESCE(substr({date}, 1, 7), '')"
+
+
+def _summary_add(row):
+    # Add payroll row ``row`` (NEW or OLD) to its group, creating the group
+    return f'''
+    INSERT INTO payroll_summary (period, department, job_title, row_count, {", ".join(REPORT_COLUMNS)})
+    SELECT {_summary_period(f"{row}.date")}, department, job_title, 1,
+        {", ".join(f"COALESCE({row}.{col}, 0)" for col in REPORT_COLUMNS)}
+    FROM employees WHERE employee_key = {row}.employee_key
+    ON CONFLICT (period, department, job_title) DO UPDATE SET row_count = row_count + 1,
+        {", ".join(f"{col} = {col} + excluded.{col}" for col in REPORT_COLUMNS)};'''
+
+
+def _summary_remove(row):
+    # Take payroll row ``row`` out of its group, dropping the group once empty
+    group = (f"period = {_summary_period(f'{row}.date')} AND (department, job_title) = "
+             f"(SELECT department, job_title FROM employees WHERE employee_key = {row}.employee_key)")
+    return f'''
+    UPDATE payroll_summary SET row_count = row_count - 1,
+        {", ".join(f"{col} = {col} - COALESCE({row}.{col}, 0)" for col in REPORT_COLUMNS)}
+    WHERE {group};
+    DELETE FROM payroll_summary WHERE row_count = 0 AND {group};'''
+
+
+# Employee rows are never changed in place (other fields get a new key),
+# so only payroll needs watching
+SUMMARY_TRIGGERS = (
+    f'''CREATE TRIGGER IF NOT EXISTS payroll_summary_insert AFTER INSERT ON payroll
+BEGIN{_summary_add("NEW")}
+END''',
+    f'''CREATE TRIGGER IF NOT EXISTS payroll_summary_delete AFTER DELETE ON payroll
+BEGIN{_summary_remove("OLD")}
+END''',
+    f'''CREATE TRIGGER IF NOT EXISTS payroll_summary_update
+AFTER UPDATE OF employee_key, date, {", ".join(REPORT_COLUMNS)} ON payroll
+BEGIN{_summary_remove("OLD")}{_summary_add("NEW")}
+END''',
+)
+
+FILL_SUMMARY = f'''
+INSERT INTO payroll_summary (period, department, job_title, row_count, {", ".join(REPORT_COLUMNS)})
+SELECT {_summary_period("p.date")}, e.department, e.job_title, COUNT(*),
+    {", ".join(f"COALESCE(SUM(p.{col}), 0)" for col in REPORT_COLUMNS)}
+FROM payroll p JOIN employees e ON e.employee_key = p.employee_key
+GROUP BY 1, 2, 3
+'''
+
+
+def _add_period_summary(conn):
+    """Create payroll_summary and its triggers, filled from existing rows in
+    one grouped pass over the report index."""
+    conn.execute(SUMMARY_SCHEMA)
+    conn.execute("DELETE FROM payroll_summary")
+    conn.execute(FILL_SUMMARY)
+    for statement in SUMMARY_TRIGGERS:
+        conn.execute(statement)
+
+
+# Schema migrations in order; PRAGMA user_version records how many have run.
+# Each step must also be safe to re-run on a database that already has it.
+MIGRATIONS = (
+    _add_payroll_indexes,
+    _normalize_employees,
+    _store_minor_units,
+    _add_report_index,
+    _add_period_summary,
+)
+
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, step in enumerate(MIGRATIONS[version:], version + 1):
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+def init_database(conn):
+    conn.execute(PAYROLL_SCHEMA)
+    conn.commit()
+    # Migrate first, so rates are only ever seeded into the current layout
+    migrate(conn)
+    rates.init_rates(conn)
+    runs.init_runs(conn)
+
+
+# Searchable columns: categories match exactly, identifiers and names by prefix
+EXACT_SEARCH_COLUMNS = ("department", "job_title")
+PREFIX_SEARCH_COLUMNS = ("employee_id", "employee_name")
+
+# Sorts after every character, so [term, term + PREFIX_END) holds all
+# strings that start with term
+PREFIX_END = "\U0010ffff"
+
+
+def search_clause(column, term):
+    """Build an index-friendly WHERE clause for a search box term.
+
+    Returns ``(sql, params)``. Prefix searches use a range instead of
+    ``LIKE 'term%'`` so SQLite can seek the column's index.
+    """
+    if column in EXACT_SEARCH_COLUMNS:
+        return f"{column} = ?", (term,)
+    if column in PREFIX_SEARCH_COLUMNS:
+        return f"{column} >= ? AND {column} < ?", (term, term + PREFIX_END)
+    raise ValueError(f"Cannot search by {column!r}")
+
+
+# Sort keys that walk each search index in order, ending with the unique id.
+# A search seeks the employees index, whose entries end in employee_key,
+# then each key's rows in payroll (employee_key, date) order, so no sort
+# step is needed; matches list each employee's history together.
+SEARCH_ORDER = {
+    "employee_id": ("employee_id", "employee_key", "date", "id"),
+    "employee_name": ("employee_name", "employee_key", "date", "id"),
+    "department": ("employee_key", "date", "id"),
+    "job_title": ("employee_key", "date", "id"),
+}
+
+
+def payroll_pager(conn, column=None, term=None):
+    """A ``RowPager`` over all payroll rows, or over one search's matches.
+
+    Employee fields are joined in only for the rows of each page; the
+    total row count comes from the slim payroll table alone.
+    """
+    if column is None:
+        return RowPager(conn, table="payroll_rows", columns=PAYROLL_SELECT_COLUMNS,
+                        count_table="payroll")
+    clause, params = search_clause(column, term)
+    return RowPager(conn, clause, params, SEARCH_ORDER[column], table="payroll_rows",
+                    columns=PAYROLL_SELECT_COLUMNS)
+
+
+def payroll_query(column=None, term=None):
+    """``(sql, params)`` selecting all payroll rows, or one search's matches."""
+    if column is None:
+        return PAYROLL_SELECT, ()
+    clause, params = search_clause(column, term)
+    return f"{PAYROLL_SELECT} WHERE {clause}", params
+
+
+def select_payroll(conn, column=None, term=None):
+    """A cursor over all payroll rows, or over one search's matches."""
+    return conn.execute(*payroll_query(column, term))
+
+
+def latest_totals(conn):
+    """``(period, rows, salary)`` for the latest period in payroll_summary,
+    or None while it is empty."""
+    row = conn.execute(
+        "SELECT period, SUM(row_count), SUM(salary) FROM payroll_summary "
+        "WHERE period = (SELECT MAX(period) FROM payroll_summary)"
+    ).fetchone()
+    return None if row[0] is None else row
+
+
+def iter_cursor(cursor, fetch_size=FETCH_SIZE):
+    """Yield a cursor's rows, reading ``fetch_size`` of them at a time."""
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def search_payroll(conn, column, term, date_from=None, date_to=None):
+    """Return a cursor over payroll rows matching ``term`` in ``column``.
+
+    ``date_from``/``date_to`` optionally bound the ``date`` column
+    (inclusive start, exclusive end).
+    """
+    clause, params = search_clause(column, term)
+    if date_from is not None:
+        clause += " AND date >= ?"
+        params += (date_from,)
+    if date_to is not None:
+        clause += " AND date < ?"
+        params += (date_to,)
+    return conn.execute(f"{PAYROLL_SELECT} WHERE {clause}", params)
+
+
+class Database:
+    """One long-lived, tuned connection shared by everything in a front end.
+
+    Keeping the connection open preserves SQLite's page cache and prepared
+    statements between clicks instead of rebuilding them on every query.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = connect(self.path)
+            init_database(self._conn)
+        return self._conn
+
+    def execute(self, sql, params=()):
+        return self.conn.execute(sql, params)
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
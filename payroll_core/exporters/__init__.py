@@ -0,0 +1,9 @@
+"""File exporters that stream rows instead of materializing them."""
+
+
+def name_column(headers):
+    """Index of the employee-name column in ``headers``, or 0 when none is found."""
+    for i, header in enumerate(headers):
+        if "اسم" in header:
+            return i
+    return 0
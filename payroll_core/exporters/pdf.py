@@ -0,0 +1,262 @@
+"""PDF exports of payroll rows.
+
+``TableReport`` lays large views out in a single pass: each page's rows are
+read from the source, turned into one ``LongTable`` (header repeated with
+``repeatRows``) and handed to reportlab lazily through ``FlowableFeed``, so
+only one page of rows and cells is built at a time. reportlab still keeps
+every finished page's drawing commands until the file is saved, so memory
+grows with the size of the report, by about 2KB per row, rather than
+staying flat. ``write_employee_blocks`` lays a few selected rows out as one
+vertical table per employee.
+"""
+from datetime import datetime
+from itertools import islice
+
+from reportlab.lib.colors import beige, black, grey, whitesmoke
+from reportlab.lib.pagesizes import A4, landscape, letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import (LongTable, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table,
+                                TableStyle)
+
+from payroll_core import fonts, shaping
+
+PAGE_SIZE = landscape(A4)
+MARGIN = 0.5 * inch
+FONT = "Helvetica"
+FONT_SIZE = 7
+# Rows read ahead to size the columns and pages
+SAMPLE_ROWS = 50
+# Left and right cell padding used by the table style
+CELL_PADDING = 6
+# Frame padding SimpleDocTemplate puts on each side of its frame
+FRAME_PADDING = 6
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, -1), FONT),
+    ('FONTSIZE', (0, 0), (-1, -1), FONT_SIZE),
+    ('BACKGROUND', (0, 1), (-1, -1), beige),
+    ('GRID', (0, 0), (-1, -1), 0.5, black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), CELL_PADDING / 2),
+    ('RIGHTPADDING', (0, 0), (-1, -1), CELL_PADDING / 2),
+])
+
+
+def format_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+class FlowableFeed:
+    """List-like front over a flowable generator for ``doc.build``.
+
+    reportlab only ever looks at the head of its flowable list, so items are
+    pulled from the generator a few at a time as the head is consumed.
+    """
+
+    LOOKAHEAD = 2
+
+    def __init__(self, flowables):
+        self._source = iter(flowables)
+        self._buffer = []
+
+    def _fill(self):
+        while self._source is not None and len(self._buffer) < self.LOOKAHEAD:
+            try:
+                self._buffer.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return len(self._buffer)
+
+    def __getitem__(self, index):
+        self._fill()
+        return self._buffer[index]
+
+    def __setitem__(self, index, value):
+        self._buffer[index] = value
+
+    def __delitem__(self, index):
+        del self._buffer[index]
+
+    def insert(self, index, value):
+        self._buffer.insert(index, value)
+
+
+class TableReport:
+    """A landscape, page-at-a-time table of ``rows`` under ``headers``."""
+
+    def __init__(self, headers, title="Payroll Data Report", pagesize=PAGE_SIZE):
+        fonts.ensure(fonts.ARABIC)
+        styles = getSampleStyleSheet()
+        self.headers = list(headers)
+        self.pagesize = pagesize
+        self.title_style = styles['Title']
+        self.normal_style = styles['Normal']
+        self.title = title
+        self.cell_style = ParagraphStyle(
+            'ArabicCell',
+            parent=styles['Normal'],
+            fontName=fonts.ARABIC,
+            fontSize=FONT_SIZE,
+            leading=FONT_SIZE * 1.3,
+            alignment=1,  # Center alignment
+        )
+        self.header_style = ParagraphStyle(
+            'ArabicHeader',
+            parent=self.cell_style,
+            textColor=whitesmoke,
+        )
+        self.header_row = [self.header_cell(h) for h in self.headers]
+
+    def header_cell(self, text):
+        display, arabic = shaping.shape(text)
+        if arabic:
+            return Paragraph(display, self.header_style)
+        return text
+
+    def cell(self, value):
+        # Only text that needs shaping pays for a Paragraph
+        display, arabic = shaping.shape(format_value(value))
+        if arabic:
+            return Paragraph(display, self.cell_style)
+        return display
+
+    def text_width(self, text):
+        font = FONT if text.isascii() else fonts.ARABIC
+        return pdfmetrics.stringWidth(text, font, FONT_SIZE)
+
+    def column_widths(self, sample, available):
+        """Fit columns to the sample's widest cells, scaled to the page width."""
+        widths = [max((self.text_width(word) for word in h.split()), default=0) for h in self.headers]
+        for row in sample:
+            for i, value in enumerate(row):
+                widths[i] = max(widths[i], self.text_width(format_value(value)))
+        widths = [w + CELL_PADDING + 1 for w in widths]
+        scale = available / sum(widths)
+        return [w * scale for w in widths]
+
+    def table(self, rows, col_widths):
+        table = LongTable([self.header_row] + [[self.cell(v) for v in row] for row in rows],
+                          colWidths=col_widths, repeatRows=1)
+        table.setStyle(TABLE_STYLE)
+        return table
+
+    def page_capacity(self, sample, col_widths, available_height):
+        """Rows as tall as ``sample``'s tallest that fit under a header in ``available_height``."""
+        table = self.table(sample, col_widths)
+        table.wrap(sum(col_widths), available_height)
+        header_height, row_height = table._rowHeights[0], max(table._rowHeights[1:])
+        return max(1, int((available_height - header_height) // row_height))
+
+    def flowables(self, doc, rows):
+        """Yield the title block, then one table per page of ``rows``."""
+        rows = iter(rows)
+        title = [
+            Paragraph(self.title, self.title_style),
+            Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+                      self.normal_style),
+            Spacer(1, 12),
+        ]
+        frame_height = doc.height - 2 * FRAME_PADDING
+        frame_width = doc.width - 2 * FRAME_PADDING
+        title_height = 0
+        for flowable in title:
+            title_height += flowable.wrap(frame_width, frame_height)[1]
+            title_height += flowable.getSpaceBefore() + flowable.getSpaceAfter()
+            yield flowable
+
+        # Size the columns and rows from the first page's worth of data
+        sample = list(islice(rows, SAMPLE_ROWS))
+        if not sample:
+            return
+        col_widths = self.column_widths(sample, frame_width)
+        per_page = self.page_capacity(sample, col_widths, frame_height)
+        first_page = self.page_capacity(sample, col_widths, frame_height - title_height)
+
+        self.rows_written = 0
+        page = sample[:first_page]
+        pending = sample[first_page:]
+        while page:
+            self.rows_written += len(page)
+            yield self.table(page, col_widths)
+            page = pending[:per_page]
+            pending = pending[per_page:]
+            if len(page) < per_page:
+                page.extend(islice(rows, per_page - len(page)))
+            if page:
+                yield PageBreak()
+
+    def build(self, path, rows):
+        """Write the report for ``rows`` to ``path``; returns the row count."""
+        doc = SimpleDocTemplate(path, pagesize=self.pagesize, leftMargin=MARGIN,
+                                rightMargin=MARGIN, topMargin=MARGIN, bottomMargin=MARGIN)
+        self.rows_written = 0
+        doc.build(FlowableFeed(self.flowables(doc, rows)))
+        return self.rows_written
+
+
+def write_employee_blocks(path, headers, rows, title="تقرير الرواتب", name_index=0):
+    """One heading and vertical table per row of ``rows``; returns the count.
+
+    Rows are sequences of display strings in ``headers`` order.
+    """
+    fonts.ensure(fonts.ARABIC)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'Title',
+        parent=styles['Heading1'],
+        fontName=fonts.ARABIC,
+        fontSize=18,
+        alignment=1,  # Center alignment
+        spaceAfter=12
+    )
+    subtitle_style = ParagraphStyle(
+        'Subtitle',
+        parent=styles['Heading2'],
+        fontName=fonts.ARABIC,
+        fontSize=14,
+        alignment=1,  # Center alignment
+        spaceAfter=10
+    )
+    headers = [shaping.format_arabic(h) for h in headers]
+
+    elements = [Paragraph(shaping.format_arabic(title), title_style), Spacer(1, 0.5 * inch)]
+    count = 0
+    for count, values in enumerate(rows, 1):
+        employee_name = values[name_index] or f"موظف {count}"
+        elements.append(Paragraph(shaping.format_arabic(f"بيانات الموظف: {employee_name}"),
+                                  subtitle_style))
+        elements.append(Spacer(1, 0.25 * inch))
+
+        # Each header paired with its value
+        data = [[header, shaping.format_arabic(value)] for header, value in zip(headers, values)]
+        table = Table(data)
+        style = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), grey),
+            ('TEXTCOLOR', (0, 0), (0, -1), (1, 1, 1)),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, -1), fonts.ARABIC),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BACKGROUND', (1, 0), (1, -1), beige),
+            ('GRID', (0, 0), (-1, -1), 1, black)
+        ])
+        # Add alternating row colors
+        for i in range(0, len(data), 2):
+            style.add('BACKGROUND', (1, i), (1, i), whitesmoke)
+        table.setStyle(style)
+        elements.append(table)
+        elements.append(Spacer(1, 0.5 * inch))
+
+    SimpleDocTemplate(path, pagesize=letter).build(elements)
+    return count
@@ -0,0 +1,44 @@
+"""Process-wide registry of the TTF fonts used by the PDF exporters.
+
+Parsing a TTF file is the slow part of registering it with reportlab, so
+each configured font is loaded on first use and then reused for the life
+of the process. Registration is locked, so exporters running on several
+threads can share it.
+"""
+import threading
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+ARABIC = "Arabic"
+
+# Font name -> TTF file, loaded the first time the name is asked for
+FONTS = {
+    ARABIC: "Amiri-Regular.ttf",
+}
+
+_lock = threading.Lock()
+_registered = set()
+
+
+def configure(name, path):
+    """Add or repoint a font; a name already registered keeps its first file."""
+    with _lock:
+        FONTS[name] = path
+
+
+def ensure(name=ARABIC):
+    """Register ``name`` (and a family mapping onto itself) once; returns the name."""
+    if name in _registered:
+        return name
+    with _lock:
+        if name not in _registered:
+            pdfmetrics.registerFont(TTFont(name, FONTS[name]))
+            pdfmetrics.registerFontFamily(name, normal=name, bold=name,
+                                          italic=name, boldItalic=name)
+            _registered.add(name)
+    return name
+
+
+def registered():
+    return frozenset(_registered)
@@ -0,0 +1,126 @@
+"""Background readers that keep SQLite work off the GUI thread.
+
+Each reader opens its own connection (WAL lets it read while the GUI's
+connection writes) and hands rows to callbacks; the front ends marshal those
+callbacks onto their GUI thread with Qt signals or Tk ``after()``.
+"""
+import queue
+import sqlite3
+import threading
+
+from payroll_core import db
+
+CHUNK_SIZE = 500
+
+
+class RowStream:
+    """Read a payroll query in chunks, only as far ahead as the view asked.
+
+    The GUI calls ``request`` as the user scrolls and ``cancel`` when the view
+    closes. Between requests the worker sleeps, so an open grid costs no CPU
+    and holds only the rows that were shown.
+    """
+
+    def __init__(self, path, column=None, term=None, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.column = column
+        self.term = term
+        self.chunk_size = chunk_size
+        self._wanted = chunk_size
+        self._cancelled = False
+        self._conn = None
+        self._cond = threading.Condition()
+
+    def request(self, rows):
+        # Ask for at least ``rows`` rows in total
+        with self._cond:
+            if rows > self._wanted:
+                self._wanted = rows
+                self._cond.notify()
+
+    def cancel(self):
+        with self._cond:
+            self._cancelled = True
+            if self._conn is not None:
+                # Abort a long COUNT(*) or step in progress
+                self._conn.interrupt()
+            self._cond.notify()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def run(self, on_count, on_chunk):
+        """Worker body: report the row count, then stream chunks on demand."""
+        conn = db.connect(self.path)
+        with self._cond:
+            if self._cancelled:
+                conn.close()
+                return
+            self._conn = conn
+        try:
+            on_count(db.payroll_pager(conn, self.column, self.term).count())
+            cursor = db.select_payroll(conn, self.column, self.term)
+            loaded = 0
+            while True:
+                with self._cond:
+                    while not self._cancelled and loaded >= self._wanted:
+                        self._cond.wait()
+                    if self._cancelled:
+                        return
+                chunk = cursor.fetchmany(self.chunk_size)
+                if chunk:
+                    loaded += len(chunk)
+                    on_chunk(chunk)
+                if len(chunk) < self.chunk_size:
+                    return
+        except sqlite3.OperationalError:
+            if not self._cancelled:
+                raise
+        finally:
+            with self._cond:
+                self._conn = None
+            conn.close()
+
+
+class PageReader:
+    """Serve ``RowPager`` pages for a windowed view from a worker thread.
+
+    Requests are ``(offset, limit)`` pairs; only the newest pending one is
+    served, since a view that scrolled on has no use for the old window.
+    """
+
+    def __init__(self, path, column=None, term=None):
+        self.path = path
+        self.column = column
+        self.term = term
+        self._requests = queue.Queue()
+        self._cancelled = False
+
+    def request(self, offset, limit):
+        self._requests.put((offset, limit))
+
+    def cancel(self):
+        self._cancelled = True
+        self._requests.put(None)
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def run(self, on_count, on_page):
+        conn = db.connect(self.path)
+        try:
+            pager = db.payroll_pager(conn, self.column, self.term)
+            on_count(pager.count())
+            while True:
+                request = self._requests.get()
+                # Skip to the most recent request
+                while request is not None and not self._requests.empty():
+                    request = self._requests.get()
+                if request is None or self._cancelled:
+                    return
+                offset, limit = request
+                on_page(offset, pager.page(offset, limit))
+        finally:
+            conn.close()
@@ -0,0 +1,255 @@
+"""Opt-in peak-memory tracing for exports, grid loads and bulk runs.
+
+Tracing is off unless PAYROLL_TRACE_MEMORY is set to 1, true or yes in the
+environment or ``--trace-memory`` is given on the command line, since
+tracemalloc makes every allocation several times slower. When it is on,
+each traced operation reports the peak memory it added, what that comes
+to per row, and the source lines holding the most memory near the peak.
+Reports are appended as JSON lines to ``payroll_memory.log`` and listed
+by ``python -m payroll memory``.
+
+A streaming operation shows up as a peak that stays flat as the row count
+grows, so its bytes per row fall; one that holds every row grows with them.
+
+tracemalloc only sees this process, so payslip worker processes are not
+included. One operation is traced at a time; one that starts while
+another is being traced is left untraced.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+MEMTRACE_LOG = 'payroll_memory.log'
+
+ENV_VAR = "PAYROLL_TRACE_MEMORY"
+# Values of ENV_VAR that switch tracing on; anything else, such as 0, leaves it off
+ENV_ON = ("1", "true", "yes")
+
+# Allocation sites listed per report
+TOP_SITES = 10
+
+# How often a running trace checks whether memory has grown
+SAMPLE_SECONDS = 0.25
+
+# Memory has to grow by this factor past the last snapshot to take another
+SNAPSHOT_GROWTH = 1.25
+
+# Allocations made by the tracing itself
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_enabled = os.environ.get(ENV_VAR, "").strip().lower() in ENV_ON
+_active = None
+_lock = threading.Lock()
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+class MemoryReport:
+    """Peak bytes an operation added, and the top ``(site, bytes, blocks)``
+    allocation sites near that peak."""
+
+    def __init__(self, operation, peak, rows, sites, seconds, recorded_at=None):
+        self.operation = operation
+        self.peak = peak
+        self.rows = rows
+        self.sites = sites
+        self.seconds = seconds
+        self.recorded_at = recorded_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    @property
+    def bytes_per_row(self):
+        return self.peak / self.rows if self.rows else None
+
+    def to_json(self):
+        return {
+            "recorded_at": self.recorded_at,
+            "operation": self.operation,
+            "peak": self.peak,
+            "rows": self.rows,
+            "seconds": self.seconds,
+            "sites": [list(site) for site in self.sites],
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["operation"], data["peak"], data.get("rows"),
+                   [tuple(site) for site in data.get("sites", ())],
+                   data.get("seconds"), data.get("recorded_at"))
+
+    def __str__(self):
+        from payroll_core.perf import format_bytes
+        text = f"{self.operation}: peak {format_bytes(self.peak)}"
+        if self.rows:
+            text += f" over {self.rows:,} rows ({format_bytes(self.bytes_per_row)}/row)"
+        return text
+
+
+class MemoryTrace:
+    """Trace one operation from ``start()`` to ``stop()``.
+
+    A background thread checks memory every SAMPLE_SECONDS and, when it has
+    grown past the last look, notes the top allocation sites since the
+    start. Snapshots are themselves traced, so the peak seen before each
+    one is kept and tracemalloc's high-water mark reset after it.
+    """
+
+    def __init__(self, operation, log_path=MEMTRACE_LOG, top=TOP_SITES):
+        self.operation = operation
+        self.log_path = log_path
+        self.top = top
+        self.report = None
+        self._owner = False
+        self._done = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        self._owner = not tracemalloc.is_tracing()
+        if self._owner:
+            tracemalloc.start()
+        self._baseline = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        tracemalloc.reset_peak()
+        self._start_bytes = self._peak = tracemalloc.get_traced_memory()[0]
+        self._sites = None
+        self._sites_bytes = self._start_bytes
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def _sample(self):
+        while not self._done.wait(SAMPLE_SECONDS):
+            self._check(SNAPSHOT_GROWTH)
+
+    def _check(self, growth):
+        current, peak = tracemalloc.get_traced_memory()
+        self._peak = max(self._peak, peak)
+        if self._sites is None or current > self._sites_bytes * growth:
+            stats = tracemalloc.take_snapshot().filter_traces(_IGNORED).compare_to(
+                self._baseline, "lineno")
+            self._sites = [(str(stat.traceback[0]), stat.size_diff, stat.count_diff)
+                           for stat in stats if stat.size_diff > 0][:self.top]
+            self._sites_bytes = current
+            tracemalloc.reset_peak()
+
+    def _finish(self):
+        global _active
+        self._done.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self._owner:
+            tracemalloc.stop()
+        self._baseline = None
+        with _lock:
+            if _active is self:
+                _active = None
+
+    def stop(self, rows=None):
+        """End the trace and log its report, which is also returned."""
+        seconds = time.perf_counter() - self._started
+        self._done.set()
+        self._sampler.join()
+        self._check(1)
+        peak = self._peak - self._start_bytes
+        self._finish()
+        self.report = MemoryReport(self.operation, max(peak, 0), rows, self._sites, seconds)
+        write_report(self.report, self.log_path)
+        return self.report
+
+    def cancel(self):
+        """End the trace without a report."""
+        self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.stop()
+        else:
+            self.cancel()
+        return False
+
+
+def begin(operation, log_path=MEMTRACE_LOG):
+    """A started ``MemoryTrace`` for ``operation``, or None when tracing is
+    off or another operation is already being traced."""
+    global _active
+    if not _enabled:
+        return None
+    with _lock:
+        if _active is not None:
+            return None
+        trace = _active = MemoryTrace(operation, log_path)
+    return trace.start()
+
+
+def write_report(report, path=MEMTRACE_LOG):
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report.to_json(), ensure_ascii=False) + "\n")
+    except OSError:
+        pass
+
+
+def read_reports(path=MEMTRACE_LOG):
+    """Every report in the log, oldest first; unreadable lines are skipped."""
+    reports = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    reports.append(MemoryReport.from_json(json.loads(line)))
+                except (ValueError, KeyError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return reports
+
+
+REPORT_HEADERS = ["recorded", "operation", "rows", "peak", "per row", "seconds"]
+
+
+def report_rows(reports):
+    from payroll_core.perf import format_bytes
+    for r in reports:
+        yield [r.recorded_at, r.operation, "" if r.rows is None else f"{r.rows:,}",
+               format_bytes(r.peak), format_bytes(r.bytes_per_row),
+               "" if r.seconds is None else f"{r.seconds:.2f}"]
+
+
+def run_command(args):
+    from payroll_core.perf import format_bytes
+    from payroll_core.reports import print_table
+    if args.clear:
+        if os.path.exists(args.log):
+            os.remove(args.log)
+        print(f"Cleared {args.log}")
+        return 0
+    reports = read_reports(args.log)
+    if args.operation:
+        reports = [r for r in reports if r.operation == args.operation]
+    reports = reports[-args.last:]
+    if not reports:
+        print(f"No memory reports in {args.log}; set {ENV_VAR}=1 or pass --trace-memory")
+        return 0
+    print_table(REPORT_HEADERS, report_rows(reports))
+    if args.sites:
+        for r in reports:
+            print(f"\n{r}")
+            for site, size, blocks in r.sites:
+                print(f"  {format_bytes(size):>8} in {blocks:>7,} blocks  {site}")
+    return 0
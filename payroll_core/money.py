@@ -0,0 +1,58 @@
+"""Money as whole piastres, 100 to the pound.
+
+Amounts are parsed into integers once, computed and stored as integers,
+and turned into text only when they are displayed, so sums are exact both
+in Python and in SQLite's ``SUM()``.
+"""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+# Piastres per pound
+MINOR_UNITS = 100
+
+_WHOLE = Decimal(1)
+
+
+def to_minor(amount):
+    """Whole piastres in an amount of pounds given as text or a number.
+
+    Halves round away from zero. Raises ``ValueError`` for anything that is
+    not a finite number.
+    """
+    try:
+        # repr() keeps a float's shortest form, so 2.675 stays 2.675
+        value = Decimal(amount if isinstance(amount, str) else repr(amount))
+    except InvalidOperation:
+        raise ValueError(f"{amount!r} is not an amount") from None
+    if not value.is_finite():
+        raise ValueError(f"{amount!r} is not an amount")
+    try:
+        minor = (value * MINOR_UNITS).quantize(_WHOLE, rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        # More digits than the decimal context holds, e.g. 1e400
+        raise ValueError(f"{amount!r} is not an amount") from None
+    return int(minor)
+
+
+def to_pounds(minor):
+    """A piastre amount as a float number of pounds, for spreadsheets."""
+    return None if minor is None else minor / MINOR_UNITS
+
+
+def format_money(minor, symbol=""):
+    """``123450`` as ``"1234.50"``, after ``symbol`` if one is given."""
+    if minor is None:
+        return ""
+    sign = "-" if minor < 0 else ""
+    pounds, piastres = divmod(abs(minor), MINOR_UNITS)
+    return f"{symbol}{sign}{pounds}.{piastres:02d}"
+
+
+def display_row(row, amounts):
+    """Render a row as text; ``amounts`` flags the values held in piastres."""
+    return [format_money(value) if amount else ("" if value is None else str(value))
+            for value, amount in zip(row, amounts)]
+
+
+def pounds_row(row, amounts):
+    """A row with the flagged piastre values turned into pounds."""
+    return [to_pounds(value) if amount else value for value, amount in zip(row, amounts)]
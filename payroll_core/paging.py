@@ -0,0 +1,125 @@
+"""Positional access to a query's rows without loading the whole result.
+
+Grids ask for "rows N to N+k" as the user scrolls. ``RowPager`` answers with
+keyset pagination from the nearest row it has already seen, falling back to
+``OFFSET`` only for the distance from that row, so sequential scrolling
+never rescans what came before.
+"""
+from bisect import bisect_right, insort
+
+# Positions of already-fetched rows whose sort keys are remembered per pager
+MAX_ANCHORS = 1024
+
+
+class RowPager:
+    def __init__(self, conn, where="", params=(), order=("id",), table="payroll",
+                 columns="*", count_table=None):
+        # ``order`` must end with a unique column so keys never tie.
+        # ``count_table`` answers count() when a cheaper table than ``table``
+        # holds the same rows, e.g. the base table under a joined view.
+        self.conn = conn
+        self.where = where
+        self.params = tuple(params)
+        self.order = tuple(order)
+        self.table = table
+        self.count_table = count_table or table
+        self._count = None
+        self._anchors = []
+        self._keys = {}
+
+        key_cols = ", ".join(self.order)
+        self._select = f"SELECT {key_cols}, {columns} FROM {table}"
+        self._order_by = f" ORDER BY {key_cols}"
+
+    def count(self):
+        if self._count is None:
+            sql = f"SELECT COUNT(*) FROM {self.count_table}"
+            if self.where:
+                sql += f" WHERE {self.where}"
+            self._count = self.conn.execute(sql, self.params).fetchone()[0]
+        return self._count
+
+    def _nearest_anchor(self, offset):
+        # Last remembered row strictly before ``offset``
+        i = bisect_right(self._anchors, offset - 1)
+        if not i:
+            return None
+        anchor = self._anchors[i - 1]
+        return anchor, self._keys[anchor]
+
+    def _remember(self, offset, key):
+        if offset in self._keys:
+            return
+        insort(self._anchors, offset)
+        self._keys[offset] = key
+        if len(self._anchors) > MAX_ANCHORS:
+            # Drop the anchor furthest from the one just added
+            i = self._anchors.index(offset)
+            dropped = self._anchors.pop(0 if i > len(self._anchors) // 2 else -1)
+            del self._keys[dropped]
+
+    def _query(self, clauses, params, limit, skip=0):
+        sql = self._select
+        if self.where:
+            clauses = [self.where] + clauses
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += self._order_by + " LIMIT ? OFFSET ?"
+        return self.conn.execute(sql, self.params + tuple(params) + (limit, skip)).fetchall()
+
+    def _segments(self, key):
+        # Rows after ``key`` in sort order, as index ranges visited in turn:
+        # (a = ? AND b = ? AND id > ?), then (a = ? AND b > ?), then (a > ?).
+        # Each one is a plain seek, unlike a row-value comparison which SQLite
+        # only narrows on its first column.
+        for i in range(len(self.order) - 1, -1, -1):
+            clauses = [f"{col} = ?" for col in self.order[:i]]
+            clauses.append(f"{self.order[i]} > ?")
+            yield clauses, key[:i + 1]
+
+    def _count_where(self, clauses, params):
+        sql = f"SELECT COUNT(*) FROM {self.table} WHERE " + " AND ".join(
+            ([self.where] if self.where else []) + clauses)
+        return self.conn.execute(sql, self.params + tuple(params)).fetchone()[0]
+
+    def _after(self, key, limit, skip=0):
+        rows = []
+        for clauses, params in self._segments(key):
+            batch = self._query(clauses, params, limit - len(rows), skip)
+            if skip and not batch:
+                # The whole segment lies inside the skipped stretch
+                skip = max(0, skip - self._count_where(clauses, params))
+                continue
+            skip = 0
+            rows.extend(batch)
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def page(self, offset, limit):
+        """Return up to ``limit`` rows starting at position ``offset``."""
+        offset = max(0, offset)
+        anchor = self._nearest_anchor(offset)
+        if anchor is None:
+            rows = self._query([], (), limit, offset)
+        else:
+            anchor_offset, key = anchor
+            rows = self._after(key, limit, offset - anchor_offset - 1)
+
+        # Every fetched row becomes an anchor, so scrolling back a little
+        # also resumes from a known key
+        k = len(self.order)
+        for i, row in enumerate(rows):
+            self._remember(offset + i, row[:k])
+        return [row[k:] for row in rows]
+
+    def iter_rows(self, batch_size=1000):
+        """Yield every row in order, one keyset page at a time."""
+        k = len(self.order)
+        rows = self._query([], (), batch_size)
+        while rows:
+            for row in rows:
+                yield row[k:]
+            if len(rows) < batch_size:
+                return
+            rows = self._after(rows[-1][:k], batch_size)
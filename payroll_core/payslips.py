@@ -0,0 +1,257 @@
+"""Month-end payslips for every employee in a payroll period.
+
+The period's rows are read once and handed out in chunks to a
+``ProcessPoolExecutor``; each worker lays out and writes its own PDFs, so
+rendering runs on every core. Output is one file per employee, or one
+merged file built from the workers' part files (merging needs ``pypdf``).
+"""
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from payroll_core import batch, db, memtrace, money
+
+# Employees rendered per worker task
+CHUNK_SIZE = 50
+
+# Payslip lines: label, payroll column, and whether the value is shown
+# with a currency sign
+PAYSLIP_FIELDS = (
+    ("رقم الموظف", "employee_id", False),
+    ("الاسم", "employee_name", False),
+    ("القسم", "department", False),
+    ("الدرجة الوظيفية", "job_title", False),
+    ("الاساسى", "basic_salary", True),
+    ("اجتماعية", "Social", False),
+    ("اساسى 30/6/15", "basic30", False),
+    ("اعانة", "enaa", False),
+    ("بحوث", "bhos", True),
+    ("ريادة", "ryada", True),
+    ("اشراف", "eshraf", True),
+    ("مكتبية", "maktabia", True),
+    ("تطوير", "tatwer", True),
+    ("جودة", "gawda", True),
+    ("فرق الجودة", "diff_gawda", True),
+    ("حافز", "hafz", True),
+    ("بدل", "badl", True),
+    ("جملة الاجر", "salary", True),
+)
+
+PAYSLIP_COLUMNS = ", ".join(column for _, column, _ in PAYSLIP_FIELDS)
+
+# Latest row per employee in the period, in employee order
+PERIOD_QUERY = f'''
+SELECT {PAYSLIP_COLUMNS} FROM payroll_rows
+WHERE id IN (
+    SELECT MAX(id) FROM payroll_rows WHERE date >= ? AND date < ? GROUP BY employee_id
+)
+ORDER BY employee_id
+'''
+
+
+class PayslipStats:
+    def __init__(self, payslips, files, seconds):
+        self.payslips = payslips
+        self.files = files
+        self.seconds = seconds
+        self.per_sec = payslips / seconds if seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.payslips} payslips in {self.files} files, "
+                f"{self.seconds:.2f}s ({self.per_sec:,.0f} payslips/s)")
+
+
+def period_bounds(period):
+    """``[start, end)`` date strings covering a ``YYYY-MM`` period."""
+    start = datetime.strptime(batch.parse_period(period), "%Y-%m-%d")
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+def payslip_filename(employee_id, period):
+    safe = re.sub(r"[^\w.-]+", "_", str(employee_id)).strip("._") or "employee"
+    return f"payslip_{period}_{safe}.pdf"
+
+
+def payslip_items(row):
+    """``(label, text)`` for each payslip line of ``row``.
+
+    ``row`` holds PAYSLIP_FIELDS values in order, or is a record mapping
+    such as ``engine.calculate_record`` returns.
+    """
+    if hasattr(row, "keys"):
+        row = [row[column] for _, column, _ in PAYSLIP_FIELDS]
+    for (label, column, currency), value in zip(PAYSLIP_FIELDS, row):
+        if column in db.MONEY_COLUMNS:
+            yield label, money.format_money(value, "$" if currency else "")
+        else:
+            yield label, "" if value is None else str(value)
+
+
+class PayslipRenderer:
+    """Lays out payslips with the same look as the single-employee export."""
+
+    def __init__(self):
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from payroll_core import fonts
+
+        fonts.ensure(fonts.ARABIC)
+        styles = getSampleStyleSheet()
+        self.title_style = ParagraphStyle(
+            'Title',
+            parent=styles['Heading1'],
+            fontName=fonts.ARABIC,
+            fontSize=18,
+            alignment=1,  # Center alignment
+            spaceAfter=12
+        )
+        self.date_style = ParagraphStyle('Date', parent=styles['Normal'], fontName=fonts.ARABIC)
+        self.issued = datetime.now().strftime("%Y-%m-%d")
+
+    def flowables(self, row):
+        from reportlab.lib.colors import beige, black, grey, whitesmoke
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+        from payroll_core import fonts, shaping
+
+        data = [[shaping.format_arabic(label), shaping.format_arabic(text)]
+                for label, text in payslip_items(row)]
+
+        table = Table(data, colWidths=[3 * inch, 2 * inch])
+        style = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), grey),
+            ('TEXTCOLOR', (0, 0), (0, -1), (1, 1, 1)),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, -1), fonts.ARABIC),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('BACKGROUND', (1, 0), (1, -1), beige),
+            ('GRID', (0, 0), (-1, -1), 1, black)
+        ])
+        # Add alternating row colors
+        for i in range(0, len(data), 2):
+            style.add('BACKGROUND', (1, i), (1, i), whitesmoke)
+        table.setStyle(style)
+
+        return [
+            Paragraph(shaping.format_arabic("بيان مرتب"), self.title_style),
+            Spacer(1, 0.25 * inch),
+            table,
+            Spacer(1, 0.5 * inch),
+            Paragraph(shaping.format_arabic(f"تاريخ الإصدار: {self.issued}"), self.date_style),
+        ]
+
+    def write(self, path, rows):
+        """Write ``rows`` to ``path``, one payslip per page."""
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import PageBreak, SimpleDocTemplate
+
+        elements = []
+        for row in rows:
+            if elements:
+                elements.append(PageBreak())
+            elements.extend(self.flowables(row))
+        SimpleDocTemplate(path, pagesize=letter).build(elements)
+
+
+_renderer = None
+
+
+def _render_chunk(rows, target, period):
+    """Worker task: render one chunk, to per-employee files or one part file."""
+    global _renderer
+    if _renderer is None:
+        _renderer = PayslipRenderer()
+    if os.path.isdir(target):
+        for row in rows:
+            _renderer.write(os.path.join(target, payslip_filename(row[0], period)), [row])
+        return len(rows)
+    _renderer.write(target, rows)
+    return 1
+
+
+def merge_pdfs(parts, path):
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        raise RuntimeError("merged payslips need the pypdf package (pip install pypdf)") from None
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(part)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def generate_payslips(conn, period, out_dir=None, merged_path=None, workers=None,
+                      chunk_size=CHUNK_SIZE):
+    """Render payslips for ``period`` into ``out_dir`` or one ``merged_path``.
+
+    Returns a ``PayslipStats``. At most two chunks per worker are in flight,
+    so memory stays bounded however many employees the period has.
+    """
+    # The process pool is only needed here, not by the front ends' payslip exports
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    if (out_dir is None) == (merged_path is None):
+        raise ValueError("Give exactly one of an output directory or a merged file")
+    start_time = time.perf_counter()
+    start, end = period_bounds(period)
+    workers = workers or os.cpu_count() or 1
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        parts_dir = None
+    else:
+        parts_dir = tempfile.mkdtemp(prefix="payslips-")
+
+    cursor = conn.execute(PERIOD_QUERY, (start, end))
+    parts = []
+    payslips = files = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if rows:
+                    if parts_dir is None:
+                        target = out_dir
+                    else:
+                        target = os.path.join(parts_dir, f"part{len(parts):06d}.pdf")
+                        parts.append(target)
+                    pending.add(pool.submit(_render_chunk, rows, target, period))
+                    payslips += len(rows)
+                if pending and (not rows or len(pending) >= 2 * workers):
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        files += future.result()
+                if not rows and not pending:
+                    break
+        if parts:
+            merge_pdfs(parts, merged_path)
+            files = 1
+    finally:
+        cursor.close()
+        if parts_dir is not None:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+    return PayslipStats(payslips, files, time.perf_counter() - start_time)
+
+
+def run_command(args):
+    # Only this process is traced; worker processes render the payslips
+    trace = memtrace.begin("payslips")
+    conn = db.connect(args.db)
+    try:
+        db.init_database(conn)
+        stats = generate_payslips(conn, args.period, args.out_dir, args.merged,
+                                  args.workers, args.chunk_size)
+    finally:
+        conn.close()
+    print(f"Wrote payslips for {args.period}: {stats}")
+    if trace is not None:
+        print(trace.stop(stats.payslips))
+    return 0
@@ -0,0 +1,282 @@
+"""Timings of the front ends' hot paths, kept in a small rolling store.
+
+An operation is timed with ``measure()``, either as a context manager or
+by calling ``stop()`` where the work ends, or with the ``timed()``
+decorator around a whole function. Each stopped timing records its
+duration, and the rows handled and bytes written when those are given,
+in ``payroll_perf.db``. Only the latest MAX_SAMPLES timings per operation
+are kept, so the file stays small however long the app runs.
+
+Recording is best effort: a store that cannot be written never gets in
+the way of the operation being timed.
+
+With memory tracing switched on (see ``payroll_core.memtrace``), the
+exports and grid loads in MEMORY_TRACED also have their peak memory traced
+for as long as they are timed.
+"""
+import functools
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from payroll_core import memtrace
+
+PERF_PATH = 'payroll_perf.db'
+
+# Timings kept per operation; older ones are dropped as new ones arrive
+MAX_SAMPLES = 500
+
+# Operations (or name prefixes) whose memory is traced when tracing is on
+MEMORY_TRACED = ("export_", "load_all_data", "search_data")
+
+# Percentiles shown for each operation
+PERCENTILES = (50, 90, 99)
+
+PERF_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS timings (
+    id INTEGER PRIMARY KEY,
+    operation TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    rows INTEGER,
+    bytes INTEGER,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_timings_operation ON timings (operation, id);
+'''
+
+INSERT_TIMING = '''
+INSERT INTO timings (operation, recorded_at, seconds, rows, bytes, failed)
+VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Drop all but the newest MAX_SAMPLES timings of one operation
+TRIM_TIMINGS = '''
+DELETE FROM timings WHERE operation = ? AND id <= (
+    SELECT id FROM timings WHERE operation = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+)
+'''
+
+
+def percentile(values, p):
+    """Nearest-rank ``p``th percentile of sorted ``values``."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+class Timing:
+    """One run of an operation, started when it is created.
+
+    A timing that is never stopped, or is cancelled, is not recorded.
+    """
+
+    def __init__(self, store, operation):
+        self.store = store
+        self.operation = operation
+        self.rows = None
+        self.bytes = None
+        self.path = None
+        self.seconds = None
+        self.memory = memtrace.begin(operation) if operation.startswith(MEMORY_TRACED) else None
+        self._start = time.perf_counter()
+        self._done = False
+
+    def stop(self, rows=None, bytes=None, path=None, failed=False):
+        """Record the elapsed time; ``path`` is a written file to take the size of."""
+        if self._done:
+            return self
+        self._done = True
+        self.seconds = time.perf_counter() - self._start
+        self.rows = rows if rows is not None else self.rows
+        self.bytes = bytes if bytes is not None else self.bytes
+        path = path or self.path
+        if self.bytes is None and path:
+            try:
+                self.bytes = os.path.getsize(path)
+            except OSError:
+                pass
+        self.store.record(self, failed)
+        if self.memory is not None:
+            if failed:
+                self.memory.cancel()
+            else:
+                self.memory.stop(self.rows)
+        return self
+
+    def cancel(self):
+        self._done = True
+        if self.memory is not None:
+            self.memory.cancel()
+
+    def __del__(self):
+        # A timing abandoned by an exception must not keep its memory trace running
+        if not self._done and self.memory is not None:
+            self.memory.cancel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop(failed=exc_type is not None)
+        return False
+
+
+class OperationStats:
+    def __init__(self, operation, seconds, rows, sizes, failures):
+        self.operation = operation
+        self.count = len(seconds)
+        self.failures = failures
+        seconds = sorted(seconds)
+        self.percentiles = {p: percentile(seconds, p) for p in PERCENTILES}
+        self.max = seconds[-1] if seconds else None
+        self.mean_rows = sum(rows) / len(rows) if rows else None
+        self.mean_bytes = sum(sizes) / len(sizes) if sizes else None
+
+
+class PerfStore:
+    """The rolling timings file. Safe to share between threads."""
+
+    def __init__(self, path=PERF_PATH, max_samples=MAX_SAMPLES):
+        self.path = path
+        self.max_samples = max_samples
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.executescript(PERF_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def measure(self, operation):
+        return Timing(self, operation)
+
+    def record(self, timing, failed=False):
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(INSERT_TIMING, (
+                    timing.operation, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    timing.seconds, timing.rows, timing.bytes, int(failed),
+                ))
+                conn.execute(TRIM_TIMINGS, (timing.operation, timing.operation, self.max_samples))
+                conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def summary(self):
+        """``OperationStats`` for every operation with timings, by name."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT operation, seconds, rows, bytes, failed FROM timings ORDER BY operation"
+            ).fetchall()
+        stats = []
+        for operation in sorted({row[0] for row in rows}):
+            mine = [row for row in rows if row[0] == operation]
+            stats.append(OperationStats(
+                operation,
+                [row[1] for row in mine if not row[4]],
+                [row[2] for row in mine if row[2] is not None and not row[4]],
+                [row[3] for row in mine if row[3] is not None and not row[4]],
+                sum(row[4] for row in mine),
+            ))
+        return stats
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM timings")
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def default_store():
+    """The process-wide store at PERF_PATH, opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PerfStore()
+        return _store
+
+
+def measure(operation):
+    """Start timing ``operation`` in the default store."""
+    return default_store().measure(operation)
+
+
+def timed(operation=None):
+    """Decorator timing every call of a function, named after it by default."""
+    def decorate(func):
+        name = operation or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return ""
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def format_bytes(size):
+    if size is None:
+        return ""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def report_rows(stats):
+    """Display cells for each of ``stats``: operation, count, failures,
+    each percentile, max, mean rows and mean bytes."""
+    for s in stats:
+        yield ([s.operation, str(s.count), str(s.failures)]
+               + [format_seconds(s.percentiles[p]) for p in PERCENTILES]
+               + [format_seconds(s.max),
+                  "" if s.mean_rows is None else f"{s.mean_rows:,.0f}",
+                  format_bytes(s.mean_bytes)])
+
+
+REPORT_HEADERS = (["operation", "count", "failed"] + [f"p{p}" for p in PERCENTILES]
+                  + ["max", "rows", "bytes"])
+
+
+def run_command(args):
+    from payroll_core.reports import print_table
+    store = PerfStore(args.store)
+    try:
+        if args.clear:
+            store.clear()
+            print(f"Cleared {args.store}")
+            return 0
+        stats = store.summary()
+    finally:
+        store.close()
+    if not stats:
+        print(f"No timings recorded in {args.store}")
+        return 0
+    print_table(REPORT_HEADERS, report_rows(stats))
+    return 0
@@ -0,0 +1,145 @@
+"""Effective-dated job-title allowance rates stored in ``payroll.db``.
+
+The rows are compiled into a ``RateTable``: a dense array of allowances
+indexed by grade code, so resolving an employee's badl/gawda/diff_gawda/hafz
+is a single array lookup for one employee or a whole batch. Amounts are in
+piastres.
+"""
+import hashlib
+from datetime import date
+
+import numpy as np
+
+GRADE_COLUMNS = ("badl", "gawda", "diff_gawda", "hafz")
+
+# Seed rates written to an empty table: grade code, job title, allowances
+# in piastres
+DEFAULT_EFFECTIVE_FROM = "2000-01-01"
+DEFAULT_RATES = (
+    (1, "أ.د", (350000, 427000, 33000, 260000)),
+    (2, "أ.م.د", (300000, 377000, 23000, 247500)),
+    (3, "د", (250000, 312000, 14000, 205000)),
+    (4, "م.م", (150000, 290000, 10000, 185000)),
+    (5, "م", (100000, 185000, 4000, 185000)),
+)
+
+RATES_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS job_title_rates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    grade_code INTEGER NOT NULL,
+    job_title TEXT NOT NULL,
+    effective_from TEXT NOT NULL,
+    badl INTEGER NOT NULL,
+    gawda INTEGER NOT NULL,
+    diff_gawda INTEGER NOT NULL,
+    hafz INTEGER NOT NULL,
+    UNIQUE (grade_code, effective_from)
+)
+'''
+
+SELECT_RATES = '''
+SELECT grade_code, job_title, effective_from, badl, gawda, diff_gawda, hafz
+FROM job_title_rates ORDER BY grade_code, effective_from
+'''
+
+
+def init_rates(conn):
+    conn.execute(RATES_SCHEMA)
+    if conn.execute("SELECT 1 FROM job_title_rates LIMIT 1").fetchone() is None:
+        conn.executemany(
+            "INSERT INTO job_title_rates (grade_code, job_title, effective_from, "
+            "badl, gawda, diff_gawda, hafz) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(code, title, DEFAULT_EFFECTIVE_FROM) + amounts
+             for code, title, amounts in DEFAULT_RATES]
+        )
+    conn.commit()
+
+
+def convert_to_minor_units(conn):
+    """Rebuild a table of pound amounts (``REAL`` columns) in piastres.
+
+    Runs inside the caller's transaction; a table already in piastres, or
+    no table at all, is left alone.
+    """
+    types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(job_title_rates)")}
+    if types.get("badl") != "REAL":
+        return
+    conn.execute("ALTER TABLE job_title_rates RENAME TO job_title_rates_pounds")
+    conn.execute(RATES_SCHEMA)
+    amounts = ", ".join(f"CAST(ROUND({col} * 100) AS INTEGER)" for col in GRADE_COLUMNS)
+    conn.execute(
+        "INSERT INTO job_title_rates (id, grade_code, job_title, effective_from, "
+        f"{', '.join(GRADE_COLUMNS)}) SELECT id, grade_code, job_title, effective_from, "
+        f"{amounts} FROM job_title_rates_pounds"
+    )
+    conn.execute("DROP TABLE job_title_rates_pounds")
+
+
+class RateTable:
+    """Allowances in force on one date, compiled for array lookups."""
+
+    def __init__(self, rows, as_of):
+        self.as_of = as_of
+
+        # Latest row per grade that is already in force; rows come sorted
+        current = {}
+        for grade, title, effective_from, *amounts in rows:
+            if effective_from <= as_of:
+                current[grade] = (title, amounts)
+
+        size = max(current, default=0) + 1
+        # Row 0 stays zero for job titles the table does not know
+        self.allowances = np.zeros((size, len(GRADE_COLUMNS)), dtype=np.int64)
+        self.codes = {}
+        for grade in sorted(current):
+            title, amounts = current[grade]
+            self.allowances[grade] = amounts
+            self.codes[title] = grade
+        self.job_titles = list(self.codes)
+
+        # Identifies the rates in force on as_of, not the stored rows, so a
+        # change stored ahead of time alters the version once it takes effect
+        compiled = (sorted(self.codes.items()), self.allowances.tolist())
+        self.version = hashlib.sha1(repr(compiled).encode("utf-8")).hexdigest()[:16]
+
+    def code(self, job_title):
+        return self.codes.get(job_title, 0)
+
+    def encode(self, job_titles):
+        """Turn a sequence of job title strings into an array of grade codes."""
+        codes = self.codes
+        return np.fromiter((codes.get(t, 0) for t in job_titles), dtype=np.intp)
+
+    def lookup(self, job_title):
+        return tuple(self.allowances[self.code(job_title)].tolist())
+
+
+def default_rates():
+    rows = [(code, title, DEFAULT_EFFECTIVE_FROM) + amounts
+            for code, title, amounts in DEFAULT_RATES]
+    return RateTable(rows, date.today().isoformat())
+
+
+def load_rates(conn, as_of=None):
+    as_of = as_of or date.today().isoformat()
+    return RateTable(conn.execute(SELECT_RATES).fetchall(), as_of)
+
+
+class RateCache:
+    """Keeps the compiled table and recompiles only when the stored rates change.
+
+    The rate table is a handful of rows, so re-reading it on every calculation
+    is cheap and means edits in ``payroll.db`` apply without a restart.
+    """
+
+    def __init__(self):
+        self._rows = None
+        self._table = None
+
+    def get(self, conn, as_of=None):
+        as_of = as_of or date.today().isoformat()
+        rows = conn.execute(SELECT_RATES).fetchall()
+        if self._table is None or rows != self._rows or as_of != self._table.as_of:
+            self._rows = rows
+            self._table = RateTable(rows, as_of)
+        return self._table
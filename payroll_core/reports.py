@@ -0,0 +1,169 @@
+"""Department, grade and monthly totals computed in SQL.
+
+Totals and row counts come from ``payroll_summary``, which triggers keep
+current per period, department and job title (see ``payroll_core.db``), so
+a report reads a few rows however large payroll grows.
+
+Headcounts of distinct employees cannot be kept that way, so asking for
+them runs a single ``GROUP BY`` over the slim payroll table instead, joined
+to ``employees`` for the department and job title. The ``idx_payroll_report``
+covering index holds every payroll column that reads, so SQLite never
+touches the table rows, and a period filter becomes one range of that
+index. Either way only the grouped rows reach Python.
+"""
+import csv
+import sys
+
+from payroll_core import db, money
+from payroll_core.payslips import PAYSLIP_FIELDS, period_bounds
+
+# Report groupings: SQL expression and column label
+GROUPINGS = {
+    "department": ("e.department", "القسم"),
+    "job_title": ("e.job_title", "الدرجة الوظيفية"),
+    "month": ("substr(p.date, 1, 7)", "الشهر"),
+}
+
+# The same groupings over payroll_summary
+SUMMARY_GROUPINGS = {
+    "department": "department",
+    "job_title": "job_title",
+    "month": "period",
+}
+
+_LABELS = {column: label for label, column, _ in PAYSLIP_FIELDS}
+
+
+def average(total, count):
+    """``total / count`` rounded to the piastre, halves up."""
+    if total is None or not count:
+        return None
+    return (2 * total + count) // (2 * count)
+
+
+class ReportResult:
+    """Grouped rows: the group values, headcount, row count, then one
+    total per amount column. Averages are derived when rendering, and the
+    headcount is None unless it was asked for."""
+
+    def __init__(self, by, columns, rows):
+        self.by = by
+        self.columns = columns
+        self.rows = rows
+
+    def headers(self):
+        names = list(self.by) + ["headcount", "rows"]
+        for column in self.columns:
+            names += [f"{column}_total", f"{column}_average"]
+        return names
+
+    def labels(self):
+        names = [GROUPINGS[key][1] for key in self.by] + ["عدد الموظفين", "عدد السجلات"]
+        for column in self.columns:
+            names += [f"إجمالي {_LABELS[column]}", f"متوسط {_LABELS[column]}"]
+        return names
+
+    def display_rows(self):
+        k = len(self.by)
+        for row in self.rows:
+            count = row[k + 1]
+            cells = ["" if value is None else str(value) for value in row[:k + 2]]
+            for total in row[k + 2:]:
+                cells += [money.format_money(total), money.format_money(average(total, count))]
+            yield cells
+
+
+def parse_list(text, choices, what):
+    """Split a comma-separated option into names, checking each is known."""
+    names = tuple(name.strip() for name in text.split(",") if name.strip())
+    unknown = [name for name in names if name not in choices]
+    if unknown or not names:
+        raise ValueError(f"Unknown {what} {', '.join(unknown) or text!r}; "
+                         f"choose from {', '.join(choices)}")
+    return names
+
+
+def run_report(conn, by=("department",), first=None, last=None, columns=db.REPORT_COLUMNS,
+               headcount=False):
+    """Totals per group of ``by`` for periods ``first`` to ``last`` (``YYYY-MM``, inclusive).
+
+    ``headcount`` also counts distinct employees, which scans payroll
+    rather than reading the summary. Returns a ``ReportResult`` with the
+    groups in order.
+    """
+    for key in by:
+        if key not in GROUPINGS:
+            raise ValueError(f"Cannot group by {key!r}")
+    for column in columns:
+        if column not in db.REPORT_COLUMNS:
+            raise ValueError(f"Cannot report on {column!r}")
+
+    if headcount:
+        sql, params = _scan_query(by, first, last, columns)
+    else:
+        sql, params = _summary_query(by, first, last, columns)
+    order = ", ".join(str(i) for i in range(1, len(by) + 1))
+    sql += f" GROUP BY {order} ORDER BY {order}"
+    return ReportResult(tuple(by), tuple(columns), conn.execute(sql, params).fetchall())
+
+
+def _scan_query(by, first, last, columns):
+    groups = ", ".join(GROUPINGS[key][0] for key in by)
+    totals = ", ".join(f"SUM(p.{column})" for column in columns)
+    sql = (f"SELECT {groups}, COUNT(DISTINCT e.employee_id), COUNT(*), {totals} "
+           "FROM payroll p JOIN employees e ON e.employee_key = p.employee_key")
+    clauses, params = [], []
+    if first is not None:
+        clauses.append("p.date >= ?")
+        params.append(period_bounds(first)[0])
+    if last is not None:
+        clauses.append("p.date < ?")
+        params.append(period_bounds(last)[1])
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    return sql, params
+
+
+def _summary_query(by, first, last, columns):
+    groups = ", ".join(SUMMARY_GROUPINGS[key] for key in by)
+    totals = ", ".join(f"SUM({column})" for column in columns)
+    sql = f"SELECT {groups}, NULL, SUM(row_count), {totals} FROM payroll_summary"
+    clauses, params = [], []
+    # Periods compare as text, so pass them on in their full YYYY-MM form
+    if first is not None:
+        clauses.append("period >= ?")
+        params.append(period_bounds(first)[0][:7])
+    if last is not None:
+        clauses.append("period <= ?")
+        params.append(period_bounds(last)[0][:7])
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    return sql, params
+
+
+def print_table(headers, rows, out=sys.stdout):
+    rows = list(rows)
+    widths = [max([len(h)] + [len(row[i]) for row in rows]) for i, h in enumerate(headers)]
+    for cells in [headers] + rows:
+        print("  ".join(cell.rjust(width) for cell, width in zip(cells, widths)), file=out)
+
+
+def run_command(args):
+    by = parse_list(args.by, GROUPINGS, "grouping")
+    columns = parse_list(args.columns, db.REPORT_COLUMNS, "column")
+    conn = db.connect(args.db)
+    try:
+        db.init_database(conn)
+        result = run_report(conn, by, args.first, args.last, columns, args.headcount)
+    finally:
+        conn.close()
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(result.headers())
+            writer.writerows(result.display_rows())
+        print(f"Wrote {len(result.rows)} groups to {args.csv}")
+    else:
+        print_table(result.headers(), result.display_rows())
+    return 0
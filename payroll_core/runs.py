@@ -0,0 +1,117 @@
+"""Payroll runs and the input hashes that make reruns incremental.
+
+Every batch run is recorded in ``payroll_runs`` with the rate-table version
+it used, and ``payroll_run_inputs`` keeps a hash of each employee's input
+row. The next run only recomputes employees whose hash changed; everyone
+else has last run's payroll row copied forward under the new date.
+"""
+import hashlib
+from datetime import datetime
+
+RUNS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS payroll_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    period TEXT NOT NULL UNIQUE,
+    date TEXT NOT NULL,
+    rate_version TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    employees INTEGER NOT NULL DEFAULT 0,
+    computed INTEGER NOT NULL DEFAULT 0,
+    copied INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS payroll_run_inputs (
+    run_id INTEGER NOT NULL REFERENCES payroll_runs(id),
+    employee_id TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    PRIMARY KEY (run_id, employee_id)
+) WITHOUT ROWID;
+'''
+
+# Input hashes of the chunk being written, before they are recorded for the run
+CHUNK_SCHEMA = '''
+CREATE TEMP TABLE IF NOT EXISTS run_chunk (
+    employee_id TEXT PRIMARY KEY,
+    input_hash TEXT NOT NULL
+) WITHOUT ROWID
+'''
+
+INSERT_CHUNK_HASH = "INSERT INTO run_chunk (employee_id, input_hash) VALUES (?, ?)"
+RECORD_CHUNK = '''
+INSERT INTO payroll_run_inputs (run_id, employee_id, input_hash)
+SELECT ?, employee_id, input_hash FROM run_chunk
+'''
+
+class RunStats:
+    def __init__(self, run_id, employees, computed, copied, seconds):
+        self.run_id = run_id
+        self.employees = employees
+        self.computed = computed
+        self.copied = copied
+        self.seconds = seconds
+
+    def __str__(self):
+        return (f"run {self.run_id}: {self.employees} employees, {self.computed} computed, "
+                f"{self.copied} copied forward in {self.seconds:.2f}s")
+
+
+def init_runs(conn):
+    conn.executescript(RUNS_SCHEMA)
+    conn.commit()
+
+
+def input_hash(row, columns, rate_version):
+    """Hash of one employee's input values together with the rate version."""
+    text = "\x1f".join([rate_version] + [repr(row[col]) for col in columns])
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def find_run(conn, period):
+    return conn.execute("SELECT id FROM payroll_runs WHERE period = ?", (period,)).fetchone()
+
+
+def previous_run(conn, period):
+    """``(id, date)`` of the latest run for a period before ``period``, or None."""
+    return conn.execute(
+        "SELECT id, date FROM payroll_runs WHERE period < ? ORDER BY period DESC LIMIT 1",
+        (period,)
+    ).fetchone()
+
+
+def record_chunk(conn, run_id, hashes):
+    """Stage one chunk's ``(employee_id, input_hash)`` pairs and record them
+    for ``run_id``.
+
+    Only a chunk is held at a time. An employee ID repeated within the chunk,
+    or already recorded for the run, raises ``sqlite3.IntegrityError``.
+    """
+    conn.execute("DELETE FROM run_chunk")
+    conn.executemany(INSERT_CHUNK_HASH, hashes)
+    conn.execute(RECORD_CHUNK, (run_id,))
+
+
+def repeated_employee(conn, run_id, employee_ids):
+    """The first of ``employee_ids`` that repeats among them or is already
+    recorded for ``run_id``."""
+    seen = set()
+    for employee_id in employee_ids:
+        if employee_id in seen or conn.execute(
+                "SELECT 1 FROM payroll_run_inputs WHERE run_id = ? AND employee_id = ?",
+                (run_id, employee_id)).fetchone():
+            return employee_id
+        seen.add(employee_id)
+    return None
+
+
+def start_run(conn, period, date, rate_version):
+    cursor = conn.execute(
+        "INSERT INTO payroll_runs (period, date, rate_version, started_at) VALUES (?, ?, ?, ?)",
+        (period, date, rate_version, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    )
+    return cursor.lastrowid
+
+
+def finish_run(conn, run_id, employees, computed, copied):
+    conn.execute(
+        "UPDATE payroll_runs SET employees = ?, computed = ?, copied = ? WHERE id = ?",
+        (employees, computed, copied, run_id)
+    )
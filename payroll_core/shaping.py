@@ -0,0 +1,39 @@
+"""Arabic reshaping and bidi reordering for exported text, memoized.
+
+Names, departments, grades and column headers repeat thousands of times in
+a large export, so shaped strings are kept in a bounded LRU cache.
+``cache_info()`` reports its hits and misses.
+"""
+from functools import lru_cache
+
+import arabic_reshaper
+from bidi.algorithm import get_display
+
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _display(text):
+    return get_display(arabic_reshaper.reshape(text))
+
+
+def shape(text):
+    """Return ``(display_text, needs_shaping)`` for ``text``.
+
+    Plain ASCII passes through untouched and never enters the cache.
+    """
+    if text.isascii():
+        return text, False
+    return _display(text), True
+
+
+def format_arabic(text):
+    return shape(text)[0]
+
+
+def cache_info():
+    return _display.cache_info()
+
+
+def clear_cache():
+    _display.cache_clear()
@@ -0,0 +1,121 @@
+"""Cold-start measurement for the desktop front ends.
+
+Each measurement runs in a fresh interpreter, so nothing is already in
+``sys.modules``. The import report comes from ``python -X importtime``;
+the window measurement times process launch to the main window's first
+processed event loop pass (it needs a display).
+"""
+import os
+import subprocess
+import sys
+import time
+
+# Seconds from launch to the main window that a cold start should stay under
+STARTUP_BUDGET = 1.5
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FRONT_ENDS = {
+    "tk": "payroll",
+    "qt": "payrollpro",
+}
+
+# Child-side code that builds the main window and prints the wall clock
+WINDOW_SNIPPETS = {
+    "tk": (
+        "import time, payroll\n"
+        "root = payroll.Tk()\n"
+        "app = payroll.PayrollApp(root)\n"
+        "root.update()\n"
+        "print(time.time())\n"
+        "app.db.close()\n"
+        "root.destroy()\n"
+    ),
+    "qt": (
+        "import sys, time\n"
+        "from PyQt5.QtWidgets import QApplication\n"
+        "import payrollpro\n"
+        "app = QApplication(sys.argv)\n"
+        "window = payrollpro.PayrollApp()\n"
+        "window.show()\n"
+        "app.processEvents()\n"
+        "print(time.time())\n"
+        "window.close()\n"
+    ),
+}
+
+
+class ImportRecord:
+    __slots__ = ("name", "depth", "self_us", "cumulative_us")
+
+    def __init__(self, name, depth, self_us, cumulative_us):
+        self.name = name
+        self.depth = depth
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+
+
+def parse_importtime(text):
+    """Records from ``-X importtime`` output, in the order Python printed them."""
+    records = []
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the column header line
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        records.append(ImportRecord(stripped, depth, int(fields[0]), int(fields[1])))
+    return records
+
+
+def measure_imports(front="tk"):
+    """Import the front end in a fresh interpreter; returns its import records."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {FRONT_ENDS[front]}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def measure_window(front="tk"):
+    """Seconds from launching a fresh interpreter to the front end's first window."""
+    started = time.time()
+    result = subprocess.run(
+        [sys.executable, "-c", WINDOW_SNIPPETS[front]],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.split()[-1]) - started
+
+
+def report(records, top=15):
+    """Text report of the slowest top-level imports and the total import time."""
+    total = sum(r.cumulative_us for r in records if r.depth == 0)
+    lines = [f"{'cumulative':>12} {'self':>10}  module"]
+    slowest = sorted((r for r in records if r.depth <= 1), key=lambda r: r.cumulative_us,
+                     reverse=True)
+    for r in slowest[:top]:
+        lines.append(f"{r.cumulative_us / 1000:10.1f}ms {r.self_us / 1000:8.1f}ms  "
+                     f"{'  ' * r.depth}{r.name}")
+    lines.append(f"total import time: {total / 1e6:.3f}s")
+    return "\n".join(lines), total / 1e6
+
+
+def run_command(args):
+    records = measure_imports(args.front)
+    text, seconds = report(records, args.top)
+    print(text)
+    if args.window:
+        seconds = measure_window(args.front)
+        print(f"launch to first window: {seconds:.3f}s")
+    if seconds > args.budget:
+        print(f"over budget: {seconds:.3f}s > {args.budget:.3f}s", file=sys.stderr)
+        return 1
+    print(f"within budget: {seconds:.3f}s <= {args.budget:.3f}s")
+    return 0
@@ -0,0 +1,73 @@
+"""Bulk insert path for payroll rows."""
+import time
+from datetime import datetime
+from itertools import islice
+
+from payroll_core import db
+
+BATCH_SIZE = 5000
+
+
+class WriteStats:
+    def __init__(self, rows, seconds):
+        self.rows = rows
+        self.seconds = seconds
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds else float("inf")
+
+    def __str__(self):
+        return f"{self.rows} rows in {self.seconds:.2f}s ({self.rows_per_sec:,.0f} rows/sec)"
+
+
+def as_row(record, date=None):
+    """Turn a record into a tuple in ``db.PAYROLL_COLUMNS`` order.
+
+    Records may already be such tuples, or mappings keyed like
+    ``raw_results``; a mapping without a ``date`` gets ``date`` or now.
+    """
+    if not hasattr(record, "keys"):
+        return record
+    if "date" not in record:
+        record = dict(record, date=date or datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    return tuple(record[col] for col in db.PAYROLL_COLUMNS)
+
+
+class BulkWriter:
+    """Insert payroll records batch by batch inside a single transaction.
+
+    Each batch is written set-wise with ``db.insert_rows``, straight into
+    payroll rather than through the view's per-row trigger.
+
+    Records are pulled from the iterable ``batch_size`` at a time, so memory
+    stays bounded however many rows are written; the transaction is committed
+    once at the end and rolled back if anything fails. With ``commit=False``
+    the caller owns the transaction and decides both.
+    """
+
+    def __init__(self, conn, batch_size=BATCH_SIZE):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.conn = conn
+        self.batch_size = batch_size
+
+    def write(self, records, commit=True):
+        date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = (as_row(r, date) for r in records)
+        count = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                db.insert_rows(self.conn, batch)
+                count += len(batch)
+            if commit:
+                self.conn.commit()
+        except BaseException:
+            if commit:
+                self.conn.rollback()
+            raise
+        return WriteStats(count, time.perf_counter() - start)
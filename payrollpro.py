@@ -4,23 +4,92 @@ import sqlite3
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QLineEdit, QComboBox, QPushButton, QTableWidget, 
-                             QTableWidgetItem, QScrollArea, QFrame, QFileDialog, QMessageBox,
+                             QTableWidgetItem, QTableView, QScrollArea, QFrame, QFileDialog, QMessageBox,
                              QTabWidget, QGridLayout, QGroupBox, QHeaderView, QMenuBar, QMenu,
-                             QAction, QDialog, QFormLayout, QSpinBox, QDoubleSpinBox)
+                             QAction, QDialog, QFormLayout, QSpinBox, QDoubleSpinBox, QProgressBar,
+                             QCheckBox)
 from PyQt5.QtGui import QFont, QIcon, QPixmap
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QAbstractTableModel, QModelIndex, QThread, pyqtSignal
 from PyQt5.QtPrintSupport import QPrinter, QPrintDialog, QPrintPreviewDialog
-import pandas as pd
-from docx import Document
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.colors import grey, whitesmoke, beige, black
-from reportlab.lib.units import inch
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-import arabic_reshaper
-from bidi.algorithm import get_display
+from payroll_core import db, engine, money, payslips, perf, rates, writer
+from payroll_core.loader import RowStream
+
+class PayrollLoader(QThread):
+    # Runs a RowStream off the GUI thread; signals are queued back to it
+    counted = pyqtSignal(int)
+    chunk_loaded = pyqtSignal(list)
+    failed = pyqtSignal(str)
+
+    def __init__(self, stream, parent=None):
+        super().__init__(parent)
+        self.stream = stream
+
+    def run(self):
+        try:
+            self.stream.run(self.counted.emit, self.chunk_loaded.emit)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class PayrollTableModel(QAbstractTableModel):
+    # Rows requested from the loader each time the view asks for more
+    PAGE_SIZE = 500
+
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.rows = []
+        self.stream = None
+
+    def set_stream(self, stream):
+        # Show a new query; the loader thread delivers rows as they are read
+        self.beginResetModel()
+        self.stream = stream
+        self.rows = []
+        self.endResetModel()
+
+    def append_rows(self, chunk):
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(chunk) - 1)
+        self.rows.extend(chunk)
+        self.endInsertRows()
+
+    def finish_loading(self):
+        self.stream = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.text(index.row(), index.column())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.stream is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        # Reading happens on the loader thread; just raise its target
+        if not parent.isValid() and self.stream is not None:
+            self.stream.request(len(self.rows) + self.PAGE_SIZE)
+
+    def text(self, row, column):
+        # Skip the first column (ID); amounts are stored in piastres
+        value = self.rows[row][column + 1]
+        if db.PAYROLL_AMOUNTS[column]:
+            return money.format_money(value)
+        return "" if value is None else str(value)
+
 
 class PayrollApp(QMainWindow):
     def __init__(self):
@@ -39,6 +108,7 @@ class PayrollApp(QMainWindow):
         # Create UI
         self.create_menu_bar()
         self.create_main_ui()
+        self.create_status_bar()
         
         # Initialize results
         self.results = {}
@@ -96,6 +166,10 @@ class PayrollApp(QMainWindow):
         view_data_action.triggered.connect(self.view_data_from_database)
         view_menu.addAction(view_data_action)
         
+        reports_action = QAction("تقارير مجمعة", self)
+        reports_action.triggered.connect(self.show_reports)
+        view_menu.addAction(reports_action)
+        
         # Settings menu
         settings_menu = menubar.addMenu("إعدادات")
         
@@ -104,6 +178,13 @@ class PayrollApp(QMainWindow):
         font_action.triggered.connect(self.change_font_size)
         settings_menu.addAction(font_action)
         
+        # Performance menu
+        perf_menu = menubar.addMenu("الأداء")
+        
+        timings_action = QAction("أزمنة العمليات", self)
+        timings_action.triggered.connect(self.show_performance)
+        perf_menu.addAction(timings_action)
+        
         # Help menu
         help_menu = menubar.addMenu("مساعدة")
         
@@ -134,7 +215,7 @@ class PayrollApp(QMainWindow):
         
         # Define common departments and job titles for comboboxes
         self.departments = ["جرافيك", "تصوير", "ديكور", "عمارة"]
-        self.job_titles = ["أ.د", "أ.م.د", "د", "م.م", "م"]
+        self.job_titles = self.rate_table.job_titles
         
         # Row 0
         employee_layout.addWidget(QLabel("الاسم:"), 0, 0)
@@ -245,35 +326,28 @@ class PayrollApp(QMainWindow):
         self.results_table.verticalHeader().setVisible(False)
         results_layout.addWidget(self.results_table)
         
+    def create_status_bar(self):
+        # Latest period's totals, read from the trigger-kept summary table
+        self.totals_label = QLabel()
+        self.statusBar().addPermanentWidget(self.totals_label)
+        self.update_status_totals()
+        
+    def update_status_totals(self):
+        totals = db.latest_totals(self.db.conn)
+        if totals is None:
+            self.totals_label.setText("لا توجد رواتب محفوظة")
+            return
+        period, rows, salary = totals
+        self.totals_label.setText(
+            f"شهر {period}: {rows} سجل، إجمالي الرواتب {money.format_money(salary)}")
+        
     def init_database(self):
-        conn = sqlite3.connect('payroll.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS payroll (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            employee_id TEXT,
-            employee_name TEXT,
-            department TEXT,
-            job_title TEXT,
-            basic_salary REAL,
-            Social REAL,
-            basic30 REAL,
-            enaa REAL,
-            bhos REAL,
-            ryada REAL,
-            eshraf REAL,
-            maktabia REAL,
-            tatwer REAL,
-            gawda REAL,
-            diff_gawda REAL,
-            hafz REAL,
-            badl REAL,
-            salary REAL,
-            date TEXT
-        )
-        ''')
-        conn.commit()
-        conn.close()
+        # One tuned connection reused by every query in the app
+        self.db = db.Database(db.DB_PATH)
+
+        # Job-title allowances live in the database, compiled once at startup
+        self.rate_cache = rates.RateCache()
+        self.rate_table = self.rate_cache.get(self.db.conn)
         
     def new_record(self):
         # Clear all input fields
@@ -295,7 +369,6 @@ class PayrollApp(QMainWindow):
         
     def calculate_payroll(self):
         try:
-            result = 0
             # Get values from entries and comboboxes
             employee_name = self.name_entry.text()
             employee_id = self.id_entry.text()
@@ -313,122 +386,37 @@ class PayrollApp(QMainWindow):
             
             # Get and validate numeric inputs
             try:
-                basic_salary = float(self.basic_salary_entry.text())
-                social = float(self.social_entry.text())
-                basic30 = float(self.basic30_entry.text())
-                enaa = float(self.enaa.text())
+                # Amounts are read as whole piastres
+                basic_salary = money.to_minor(self.basic_salary_entry.text())
+                social = money.to_minor(self.social_entry.text())
+                basic30 = money.to_minor(self.basic30_entry.text())
+                enaa = money.to_minor(self.enaa.text())
             except ValueError:
                 QMessageBox.critical(self, "خطأ", "يرجى إدخال قيم رقمية صحيحة للراتب والساعات ومعدل الضريبة.")
                 return
                 
-            # Calculate payroll
-            result += (basic30 * 0.775)
-            bhos = (basic30 * 0.49)
-            result += bhos
-            ryada = (basic30 * 0.91)
-            result += ryada
-            eshraf = (basic30 * 1.3)
-            result += eshraf
-            maktabia = (basic30 * 0.78)
-            result += maktabia
-            tatwer = (basic30 * 0.78)
-            result += tatwer
-            gawda = 0
-            diff_gawda = 0
-            hafz = 0
-            badl = 0
-            exp = 600
-            result += exp
-            mnha = 10
-            result += mnha
-            alawa = 73.90
-            result += alawa
-            tdress = 1071
-            result += tdress
-            
-            # Apply job title specific calculations
-            if job_title == "أ.د":
-                badl = 3500
-                result += badl
-                gawda = 4270
-                diff_gawda = 330
-                hafz = 2600
-                result += (gawda + diff_gawda + hafz)
-            elif job_title == "أ.م.د":
-                badl = 3000
-                result += badl
-                gawda = 3770
-                diff_gawda = 230
-                hafz = 2475
-                result += (gawda + diff_gawda + hafz)
-            elif job_title == "د":
-                badl = 2500
-                result += badl
-                gawda = 3120
-                diff_gawda = 140
-                hafz = 2050
-                result += (gawda + diff_gawda + hafz)
-            elif job_title == "م.م":
-                badl = 1500
-                result += badl
-                gawda = 2900
-                diff_gawda = 100
-                hafz = 1850
-                result += (gawda + diff_gawda + hafz)
-            elif job_title == "م":
-                badl = 1000
-                result += badl
-                gawda = 1850
-                diff_gawda = 40
-                hafz = 1850
-                result += (gawda + diff_gawda + hafz)
-                
-            # Store results in dictionary
-            self.results = {
-                "رقم الموظف": employee_id,
-                "الاسم": employee_name,
-                "القسم": department,
-                "الدرجة الوظيفية": job_title,
-                "الاساسى": f"${basic_salary:.2f}",
-                "اجتماعية": f"{social}",
-                "اساسى 30/6/15": f"{basic30}",
-                "اعانة": f"{enaa}",
-                "بحوث": f"${bhos:.2f}",
-                "ريادة": f"${ryada:.2f}",
-                "اشراف": f"${eshraf:.2f}",
-                "مكتبية": f"${maktabia:.2f}",
-                "تطوير": f"${tatwer:.2f}",
-                "جودة": f"${gawda:.2f}",
-                "فرق الجودة": f"${diff_gawda:.2f}",
-                "حافز": f"${hafz:.2f}",
-                "بدل": f"${badl:.2f}",
-                "جملة الاجر": f"${result:.2f}"
-            }
+            # Pick up any rate changes saved since the last calculation
+            self.rate_table = self.rate_cache.get(self.db.conn)
+
+            # Timed from here so the error dialogs above are not counted
+            with perf.measure("calculate_payroll"):
+                # Calculate payroll; the raw record is what gets saved
+                self.raw_results = engine.calculate_record({
+                    "employee_id": employee_id,
+                    "employee_name": employee_name,
+                    "department": department,
+                    "job_title": job_title,
+                    "basic_salary": basic_salary,
+                    "Social": social,
+                    "basic30": basic30,
+                    "enaa": enaa,
+                }, self.rate_table)
 
-            # Save raw values for database
-            self.raw_results = {
-                "employee_id": employee_id,
-                "employee_name": employee_name,
-                "department": department,
-                "job_title": job_title,
-                "basic_salary": basic_salary,
-                "Social": social,
-                "basic30": basic30,
-                "enaa": enaa,
-                "bhos": bhos,
-                "ryada": ryada,
-                "eshraf": eshraf,
-                "maktabia": maktabia,
-                "tatwer": tatwer,
-                "gawda": gawda,
-                "diff_gawda": diff_gawda,
-                "hafz": hafz,
-                "badl": badl,
-                "salary": result
-            }
+                # Labelled, formatted lines as shown and exported
+                self.results = dict(payslips.payslip_items(self.raw_results))
 
-            # Display results
-            self.display_results()
+                # Display results
+                self.display_results()
             
         except Exception as e:
             QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء الحساب: {str(e)}")
@@ -458,43 +446,16 @@ class PayrollApp(QMainWindow):
             return
         
         try:
-            conn = sqlite3.connect('payroll.db')
-            cursor = conn.cursor()
-            
             # Current date
             current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             # Insert data
-            cursor.execute('''
-            INSERT INTO payroll (
-                employee_id, employee_name, department, job_title, basic_salary, Social, 
-                basic30, enaa, bhos, ryada, 
-                eshraf, maktabia, tatwer, gawda, diff_gawda, hafz, badl, salary, date
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                self.raw_results["employee_id"],
-                self.raw_results["employee_name"],
-                self.raw_results["department"],
-                self.raw_results["job_title"],
-                self.raw_results["basic_salary"],
-                self.raw_results["Social"],
-                self.raw_results["basic30"],
-                self.raw_results["enaa"],
-                self.raw_results["bhos"],
-                self.raw_results["ryada"],
-                self.raw_results["eshraf"],
-                self.raw_results["maktabia"],
-                self.raw_results["tatwer"],
-                self.raw_results["gawda"],
-                self.raw_results["diff_gawda"],
-                self.raw_results["hafz"],
-                self.raw_results["badl"],
-                self.raw_results["salary"],
-                current_date
-            ))
+            timing = perf.measure("save_to_database")
+            self.db.execute(db.INSERT_PAYROLL, writer.as_row(self.raw_results, current_date))
             
-            conn.commit()
-            conn.close()
+            self.db.commit()
+            timing.stop(rows=1)
+            self.update_status_totals()
             
             QMessageBox.information(self, "نجاح", "تم حفظ بيانات الراتب في قاعدة البيانات بنجاح.")
         except Exception as e:
@@ -535,20 +496,29 @@ class PayrollApp(QMainWindow):
         
         main_layout.addWidget(search_frame)
         
-        # Create table widget
-        data_table = QTableWidget()
+        # Create table view; the model reads rows from SQLite page by page
+        data_table = QTableView()
         data_table.setFont(QFont("Arial", 10))
         
         # Set column headers
         columns = ["رقم الموظف", "الاسم", "القسم", "الدرجة", "الاساسى", 
                    "اجتماعية", "اساسى30/6/15", "اعانه", "بحوث", "ريادة", "اشراف", "مكتبية", 
                    "تطوير", "جودة", "فرق الجودة", "حافز", "بدل", "جملة الاجر", "التاريخ"]
-        data_table.setColumnCount(len(columns))
-        data_table.setHorizontalHeaderLabels(columns)
-        data_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        data_model = PayrollTableModel(columns, data_table)
+        data_table.setModel(data_model)
+        data_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
         
         main_layout.addWidget(data_table)
         
+        # Progress of the background loader
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 0)
+        main_layout.addWidget(self.load_progress)
+        
+        # Stop loading when the dialog closes
+        self.data_loader = None
+        data_dialog.finished.connect(self.stop_loading)
+        
         # Create button frame
         button_frame = QFrame()
         button_layout = QHBoxLayout(button_frame)
@@ -573,26 +543,210 @@ class PayrollApp(QMainWindow):
         # Show dialog
         data_dialog.exec_()
     
-    def load_all_data(self, table):
-        # Clear the table
-        table.setRowCount(0)
-        
-        # Fetch all data from the database
-        conn = sqlite3.connect('payroll.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM payroll")
-        rows = cursor.fetchall()
-        conn.close()
-        
-        # Insert rows into the table
-        for row in rows:
-            row_position = table.rowCount()
-            table.insertRow(row_position)
+    def show_reports(self):
+        # Import necessary modules
+        from payroll_core import reports
+        
+        # Create a new dialog window
+        report_dialog = QDialog(self)
+        report_dialog.setWindowTitle("تقارير الرواتب")
+        report_dialog.setGeometry(150, 150, 1100, 500)
+        report_dialog.setLayoutDirection(Qt.RightToLeft)
+        
+        main_layout = QVBoxLayout(report_dialog)
+        
+        # Grouping and period options
+        options_frame = QFrame()
+        options_layout = QHBoxLayout(options_frame)
+        
+        options_layout.addWidget(QLabel("التجميع حسب:"))
+        group_by = QComboBox()
+        group_by.addItem("القسم", ("department",))
+        group_by.addItem("الدرجة الوظيفية", ("job_title",))
+        group_by.addItem("الشهر", ("month",))
+        group_by.addItem("القسم والشهر", ("department", "month"))
+        group_by.addItem("الدرجة الوظيفية والشهر", ("job_title", "month"))
+        options_layout.addWidget(group_by)
+        
+        options_layout.addWidget(QLabel("من شهر:"))
+        first_entry = QLineEdit()
+        first_entry.setPlaceholderText("YYYY-MM")
+        options_layout.addWidget(first_entry)
+        
+        options_layout.addWidget(QLabel("إلى شهر:"))
+        last_entry = QLineEdit()
+        last_entry.setPlaceholderText("YYYY-MM")
+        options_layout.addWidget(last_entry)
+        
+        # Distinct headcounts scan payroll; totals alone come from the summary
+        headcount_check = QCheckBox("عدد الموظفين")
+        options_layout.addWidget(headcount_check)
+        
+        show_button = QPushButton("عرض")
+        options_layout.addWidget(show_button)
+        
+        main_layout.addWidget(options_frame)
+        
+        # Only the grouped rows come back from SQLite, so a plain table will do
+        report_table = QTableWidget()
+        report_table.setFont(QFont("Arial", 10))
+        main_layout.addWidget(report_table)
+        
+        def show_report():
+            try:
+                result = reports.run_report(
+                    self.db.conn,
+                    group_by.currentData(),
+                    first_entry.text().strip() or None,
+                    last_entry.text().strip() or None,
+                    headcount=headcount_check.isChecked(),
+                )
+            except ValueError as e:
+                QMessageBox.critical(report_dialog, "خطأ", str(e))
+                return
             
-            # Skip the first column (ID)
-            for i, value in enumerate(row[1:]):
-                item = QTableWidgetItem(str(value))
-                table.setItem(row_position, i, item)
+            labels = result.labels()
+            rows = list(result.display_rows())
+            report_table.clear()
+            report_table.setColumnCount(len(labels))
+            report_table.setRowCount(len(rows))
+            report_table.setHorizontalHeaderLabels(labels)
+            for i, cells in enumerate(rows):
+                for j, text in enumerate(cells):
+                    report_table.setItem(i, j, QTableWidgetItem(text))
+            report_table.resizeColumnsToContents()
+        
+        show_button.clicked.connect(show_report)
+        
+        # Show the default report straight away
+        show_report()
+        report_dialog.exec_()
+    
+    def show_performance(self):
+        # Create a new dialog window
+        perf_dialog = QDialog(self)
+        perf_dialog.setWindowTitle("أزمنة العمليات")
+        perf_dialog.setGeometry(150, 150, 900, 400)
+        perf_dialog.setLayoutDirection(Qt.RightToLeft)
+        
+        main_layout = QVBoxLayout(perf_dialog)
+        
+        perf_table = QTableWidget()
+        perf_table.setFont(QFont("Arial", 10))
+        main_layout.addWidget(perf_table)
+        
+        buttons_frame = QFrame()
+        buttons_layout = QHBoxLayout(buttons_frame)
+        refresh_button = QPushButton("تحديث")
+        clear_button = QPushButton("مسح السجل")
+        buttons_layout.addWidget(refresh_button)
+        buttons_layout.addWidget(clear_button)
+        main_layout.addWidget(buttons_frame)
+        
+        labels = (["العملية", "عدد المرات", "فشل"] + [f"p{p}" for p in perf.PERCENTILES]
+                  + ["الأقصى", "متوسط الصفوف", "متوسط الحجم"])
+        
+        def show_timings():
+            try:
+                rows = list(perf.report_rows(perf.default_store().summary()))
+            except sqlite3.Error as e:
+                QMessageBox.critical(perf_dialog, "خطأ", f"فشل قراءة سجل الأزمنة: {e}")
+                return
+            perf_table.clear()
+            perf_table.setColumnCount(len(labels))
+            perf_table.setRowCount(len(rows))
+            perf_table.setHorizontalHeaderLabels(labels)
+            for i, cells in enumerate(rows):
+                for j, text in enumerate(cells):
+                    perf_table.setItem(i, j, QTableWidgetItem(text))
+            perf_table.resizeColumnsToContents()
+        
+        def clear_timings():
+            try:
+                perf.default_store().clear()
+            except sqlite3.Error as e:
+                QMessageBox.critical(perf_dialog, "خطأ", f"فشل مسح سجل الأزمنة: {e}")
+                return
+            show_timings()
+        
+        refresh_button.clicked.connect(show_timings)
+        clear_button.clicked.connect(clear_timings)
+        
+        show_timings()
+        perf_dialog.exec_()
+    
+    def start_loading(self, table, column=None, term=None):
+        # Replace any running load with one for the new query
+        self.stop_loading()
+        model = table.model()
+        stream = RowStream(self.db.path, column, term, model.PAGE_SIZE)
+        loader = PayrollLoader(stream, self)
+        self.data_loader = loader
+        model.set_stream(stream)
+        
+        # Timed until the first rows are on screen; a replaced load is not recorded
+        loader.timing = perf.measure("search_data" if column else "load_all_data")
+        
+        progress = self.load_progress
+        progress.setRange(0, 0)  # Busy until the row count is known
+        progress.setFormat("")
+        total_rows = 0
+        
+        # Signals a replaced loader had already queued must not reach the new query's model
+        def on_count(total):
+            nonlocal total_rows
+            if self.data_loader is not loader:
+                return
+            total_rows = total
+            progress.setRange(0, max(total, 1))
+            on_progress()
+        
+        def on_chunk(chunk):
+            if self.data_loader is not loader:
+                return
+            first_chunk = model.rowCount() == 0
+            model.append_rows(chunk)
+            if first_chunk:
+                table.resizeColumnsToContents()
+                loader.timing.stop(rows=total_rows)
+            on_progress()
+        
+        def on_progress():
+            loaded = model.rowCount()
+            progress.setValue(min(loaded, progress.maximum()))
+            progress.setFormat(f"{loaded} / {total_rows}")
+        
+        def on_finished():
+            if self.data_loader is loader:
+                model.finish_loading()
+                self.data_loader = None
+                loader.timing.stop(rows=total_rows)
+            # Finished also fires for a cancelled loader, so this frees every one
+            loader.deleteLater()
+        
+        def on_failed(message):
+            if self.data_loader is not loader:
+                return
+            loader.timing.stop(failed=True)
+            QMessageBox.critical(self, "خطأ", f"فشل تحميل البيانات: {message}")
+        
+        loader.counted.connect(on_count)
+        loader.chunk_loaded.connect(on_chunk)
+        loader.failed.connect(on_failed)
+        loader.finished.connect(on_finished)
+        loader.start()
+    
+    def stop_loading(self):
+        loader = self.data_loader
+        if loader is not None:
+            self.data_loader = None
+            loader.timing.cancel()
+            loader.stream.cancel()
+            loader.wait()
+    
+    def load_all_data(self, table):
+        # Stream the whole table in the background; pages arrive as the view scrolls
+        self.start_loading(table)
     
     def search_data(self, table):
         search_column = self.search_by.currentText()
@@ -617,30 +771,17 @@ class PayrollApp(QMainWindow):
             QMessageBox.critical(self, "خطأ", "تم تحديد عمود بحث غير صالح.")
             return
         
-        # Clear the table
-        table.setRowCount(0)
-        
-        # Search in the database
-        conn = sqlite3.connect('payroll.db')
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT * FROM payroll WHERE {db_column} LIKE ?", (f"%{search_term}%",))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        # Insert matching rows into the table
-        for row in rows:
-            row_position = table.rowCount()
-            table.insertRow(row_position)
-            
-            # Skip the first column (ID)
-            for i, value in enumerate(row[1:]):
-                item = QTableWidgetItem(str(value))
-                table.setItem(row_position, i, item)
+        # Search in the background; matching rows arrive as the view scrolls
+        self.start_loading(table, db_column, search_term)
+    
+    def selected_rows(self, table):
+        # Row numbers with at least one selected cell, in display order
+        return sorted(set(index.row() for index in table.selectionModel().selectedIndexes()))
     
     def export_view_to_excel(self, table):
-        # Get selected rows
-        selected_items = table.selectedItems()
-        if not selected_items:
+        # Get selected rows (without duplicates)
+        selected_rows = self.selected_rows(table)
+        if not selected_rows:
             QMessageBox.information(self, "معلومات", "الرجاء تحديد صفوف للتصدير.")
             return
         
@@ -655,44 +796,23 @@ class PayrollApp(QMainWindow):
             
             if not file_path:
                 return  # User cancelled
+            
+            # Time the export itself, not the file dialog
+            timing = perf.measure("export_view_to_excel")
+            
+            # Import necessary modules
+            from payroll_core.exporters import excel
                 
             # Get column headers
-            headers = []
-            for i in range(table.columnCount()):
-                headers.append(table.horizontalHeaderItem(i).text())
+            model = table.model()
+            headers = list(model.headers)
             
-            # Get selected rows (without duplicates)
-            selected_rows = sorted(set(item.row() for item in selected_items))
+            # Stream the selected rows into the workbook
+            rows = (money.pounds_row(model.rows[row][1:], db.PAYROLL_AMOUNTS)
+                    for row in selected_rows)
+            excel.write_xlsx(file_path, headers, rows, sheet_name="بيانات الرواتب")
             
-            # Get data from selected rows
-            data = []
-            for row in selected_rows:
-                row_data = []
-                for col in range(table.columnCount()):
-                    item = table.item(row, col)
-                    if item is not None:
-                        row_data.append(item.text())
-                    else:
-                        row_data.append("")
-                data.append(row_data)
-            
-            # Create DataFrame and save to Excel
-            df = pd.DataFrame(data, columns=headers)
-            
-            # Create Excel writer
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                # Write DataFrame to Excel
-                df.to_excel(writer, index=False, sheet_name="بيانات الرواتب")
-                
-                # Get the workbook and worksheet
-                workbook = writer.book
-                worksheet = writer.sheets["بيانات الرواتب"]
-                
-                # Adjust column widths for better readability
-                for i, col in enumerate(df.columns):
-                    column_width = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                    col_letter = chr(65 + i) if i < 26 else chr(64 + i // 26) + chr(65 + i % 26)
-                    worksheet.column_dimensions[col_letter].width = column_width
+            timing.stop(rows=len(selected_rows), path=file_path)
             
             QMessageBox.information(self, "نجاح", f"تم تصدير البيانات المحددة بنجاح إلى {file_path}")
             
@@ -700,9 +820,9 @@ class PayrollApp(QMainWindow):
             QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء التصدير إلى Excel: {str(e)}")
     
     def export_view_to_pdf(self, table):
-        # Get selected rows
-        selected_items = table.selectedItems()
-        if not selected_items:
+        # Get selected rows (without duplicates)
+        selected_rows = self.selected_rows(table)
+        if not selected_rows:
             QMessageBox.information(self, "معلومات", "الرجاء تحديد صفوف للتصدير.")
             return
         
@@ -718,122 +838,20 @@ class PayrollApp(QMainWindow):
             if not file_path:
                 return  # User cancelled
             
-            # Register the Arabic font
-            pdfmetrics.registerFont(TTFont('Arabic', 'Amiri-Regular.ttf'))
-            
-            # Create a PDF document
-            doc = SimpleDocTemplate(file_path, pagesize=letter)
-            
-            # Define styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'Title',
-                parent=styles['Heading1'],
-                fontName='Arabic',
-                fontSize=18,
-                alignment=1,  # Center alignment
-                spaceAfter=12
-            )
-            
-            subtitle_style = ParagraphStyle(
-                'Subtitle',
-                parent=styles['Heading2'],
-                fontName='Arabic',
-                fontSize=14,
-                alignment=1,  # Center alignment
-                spaceAfter=10
-            )
+            # Time the export itself, not the file dialog
+            timing = perf.measure("export_view_to_pdf")
             
-            # Create document elements
-            elements = []
+            # Import necessary modules
+            from payroll_core.exporters import name_column, pdf
             
-            # Add main title with proper Arabic text handling
-            title_text = arabic_reshaper.reshape("تقرير الرواتب")
-            title_bidi = get_display(title_text)
-            title = Paragraph(title_bidi, title_style)
-            elements.append(title)
-            elements.append(Spacer(1, 0.5 * inch))  # Increased spacing after main title
+            # One vertical table per selected row
+            model = table.model()
+            headers = list(model.headers)
+            rows = ([model.text(row, col) for col in range(model.columnCount())]
+                    for row in selected_rows)
+            pdf.write_employee_blocks(file_path, headers, rows, name_index=name_column(headers))
             
-            # Get headers
-            headers = []
-            for col in range(table.columnCount()):
-                text = table.horizontalHeaderItem(col).text()
-                # Use Arabic reshaper to fix text display
-                reshaped_text = arabic_reshaper.reshape(text)
-                bidi_text = get_display(reshaped_text)
-                headers.append(bidi_text)
-            
-            # Find the name column index (assuming there's a column with الاسم or اسم الموظف)
-            name_column_index = 0  # Default to the first column
-            for i, header in enumerate(headers):
-                # Check for Arabic words for "name" in their display form
-                if "اسم" in get_display(arabic_reshaper.reshape("اسم")) in header or "الاسم" in header:
-                    name_column_index = i
-                    break
-            
-            # Get selected rows (without duplicates)
-            selected_rows = sorted(set(item.row() for item in selected_items))
-            
-            # Process each selected row vertically
-            for row in selected_rows:
-                # Get employee name from the appropriate column
-                name_item = table.item(row, name_column_index)
-                
-                if name_item is not None:
-                    employee_name = name_item.text()
-                else:
-                    employee_name = f"موظف {row+1}"  # Fallback if name not found
-                
-                # Create subtitle for this employee record with proper Arabic handling
-                subtitle_text = arabic_reshaper.reshape(f"بيانات الموظف: {employee_name}")
-                
-                subtitle_bidi = get_display(subtitle_text)
-                employee_title = Paragraph(subtitle_bidi, subtitle_style)
-                elements.append(employee_title)
-                elements.append(Spacer(1, 0.25 * inch))
-                
-                # Create data for vertical display - each header paired with its value
-                vertical_data = []
-                for col in range(table.columnCount()):
-                    header = headers[col]
-                    
-                    # Get the value
-                    item = table.item(row, col)
-                    value = ""
-                    if item is not None:
-                        value_text = item.text()
-                        # Use Arabic reshaper to fix text display
-                        reshaped_value = arabic_reshaper.reshape(value_text)
-                        value = get_display(reshaped_value)
-                    
-                    # Add header-value pair
-                    vertical_data.append([header, value])
-                
-                # Create vertical table for this employee
-                vertical_table = Table(vertical_data)
-                
-                # Style the vertical table
-                v_style = TableStyle([
-                    ('BACKGROUND', (0, 0), (0, -1), grey),
-                    ('TEXTCOLOR', (0, 0), (0, -1), (1, 1, 1)),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, -1), 'Arabic'),  # Changed to Arabic font
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BACKGROUND', (1, 0), (1, -1), beige),
-                    ('GRID', (0, 0), (-1, -1), 1, black)
-                ])
-                
-                # Add alternating row colors
-                for i in range(len(vertical_data)):
-                    if i % 2 == 0:
-                        v_style.add('BACKGROUND', (1, i), (1, i), whitesmoke)
-                
-                vertical_table.setStyle(v_style)
-                elements.append(vertical_table)
-                elements.append(Spacer(1, 0.5 * inch))  # Increased spacing between employee records
-            
-            # Build PDF
-            doc.build(elements)
+            timing.stop(rows=len(selected_rows), path=file_path)
             
             QMessageBox.information(self, "نجاح", f"تم تصدير البيانات المحددة بنجاح إلى {file_path}")
             
@@ -841,9 +859,9 @@ class PayrollApp(QMainWindow):
             QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء التصدير إلى PDF: {str(e)}")
     
     def export_view_to_word(self, table):
-        # Get selected rows
-        selected_items = table.selectedItems()
-        if not selected_items:
+        # Get selected rows (without duplicates)
+        selected_rows = self.selected_rows(table)
+        if not selected_rows:
             QMessageBox.information(self, "معلومات", "الرجاء تحديد صفوف للتصدير.")
             return
         
@@ -859,85 +877,20 @@ class PayrollApp(QMainWindow):
             if not file_path:
                 return  # User cancelled
             
-            # Import necessary components
-            from docx.enum.text import WD_ALIGN_PARAGRAPH
-            from docx.shared import Inches, Pt
-            
-            # Create a new Word document
-            doc = Document()
-            
-            # Add a title
-            title = doc.add_heading("تقرير الرواتب", 0)
-            title.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+            # Time the export itself, not the file dialog
+            timing = perf.measure("export_view_to_word")
             
-            # Get headers
-            headers = []
-            for col in range(table.columnCount()):
-                header_text = table.horizontalHeaderItem(col).text()
-                headers.append(header_text)
+            # Import necessary modules
+            from payroll_core.exporters import name_column, word
             
-            # Find the name column index (assuming there's a column with الاسم or اسم الموظف)
-            name_column_index = 0  # Default to the first column
-            for i, header in enumerate(headers):
-                if "اسم" in header or "الاسم" in header:
-                    name_column_index = i
-                    break
+            # One cloned employee block per selected row
+            model = table.model()
+            headers = list(model.headers)
+            rows = ([model.text(row, col) for col in range(model.columnCount())]
+                    for row in selected_rows)
+            word.write_employee_blocks(file_path, headers, rows, name_index=name_column(headers))
             
-            # Get selected rows (without duplicates)
-            selected_rows = sorted(set(item.row() for item in selected_items))
-            
-            # Process each selected employee/row vertically
-            for row in selected_rows:
-                # Get employee name from the appropriate column
-                name_item = table.item(row, name_column_index)
-                employee_name = name_item.text() if name_item is not None else f"موظف {row+1}"
-                
-                # Add a subtitle for this employee
-                subtitle = doc.add_heading(f"بيانات الموظف: {employee_name}", level=1)
-                subtitle.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-                
-                # Create a table with 2 columns (header and value) and rows equal to number of fields
-                vertical_table = doc.add_table(rows=table.columnCount(), cols=2)
-                vertical_table.style = 'Table Grid'
-                
-                # Add data in vertical format
-                for col in range(table.columnCount()):
-                    # Set header in first column
-                    header_cell = vertical_table.cell(col, 0)
-                    header_cell.text = headers[col]
-                    
-                    # Format the header cell - make it bold and add background color
-                    for paragraph in header_cell.paragraphs:
-                        paragraph.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-                        for run in paragraph.runs:
-                            run.font.bold = True
-                            run.font.rtl = True
-                    
-                    # Set value in second column
-                    value_cell = vertical_table.cell(col, 1)
-                    item = table.item(row, col)
-                    if item is not None:
-                        value_cell.text = item.text()
-                    else:
-                        value_cell.text = ""
-                    
-                    # Format the value cell
-                    for paragraph in value_cell.paragraphs:
-                        paragraph.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-                        for run in paragraph.runs:
-                            run.font.rtl = True
-                
-                # Add space after each employee's data
-                doc.add_paragraph()
-            
-            # Set document RTL properties globally
-            for paragraph in doc.paragraphs:
-                paragraph.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-                for run in paragraph.runs:
-                    run.font.rtl = True
-            
-            # Save the document
-            doc.save(file_path)
+            timing.stop(rows=len(selected_rows), path=file_path)
             
             QMessageBox.information(self, "نجاح", f"تم تصدير البيانات المحددة بنجاح إلى {file_path}")
             
@@ -961,81 +914,13 @@ class PayrollApp(QMainWindow):
             if not file_path:
                 return  # User cancelled
             
-            # Register the Arabic font
-            pdfmetrics.registerFont(TTFont('Arabic', 'Amiri-Regular.ttf'))
-            
-            # Create a PDF document
-            doc = SimpleDocTemplate(file_path, pagesize=letter)
-            
-            # Define styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'Title',
-                parent=styles['Heading1'],
-                fontName='Arial',
-                fontSize=18,
-                alignment=1,  # Center alignment
-                spaceAfter=12
-            )
-            
-            # Create document elements
-            elements = []
-            
-            # Add title with proper Arabic text handling
-            title_text = arabic_reshaper.reshape("بيان مرتب")
-            title_bidi = get_display(title_text)
-            title = Paragraph(title_bidi, title_style)
-            elements.append(title)
-            elements.append(Spacer(1, 0.25 * inch))
-            
-            # Convert results to data for table
-            data = []
-            for key, value in self.results.items():
-                # Use Arabic reshaper to fix text display
-                reshaped_key = arabic_reshaper.reshape(key)
-                bidi_key = get_display(reshaped_key)
-                
-                if isinstance(value, str):
-                    reshaped_value = arabic_reshaper.reshape(value)
-                    bidi_value = get_display(reshaped_value)
-                else:
-                    bidi_value = str(value)
-                
-                data.append([bidi_key, bidi_value])
-            
-            # Create table
-            table = Table(data, colWidths=[3*inch, 2*inch])
-            
-            # Style the table
-            style = TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), grey),
-                ('TEXTCOLOR', (0, 0), (0, -1), (1, 1, 1)),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Arial'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('BACKGROUND', (1, 0), (1, -1), beige),
-                ('GRID', (0, 0), (-1, -1), 1, black)
-            ])
-            
-            # Add alternating row colors
-            for i in range(len(data)):
-                if i % 2 == 0:
-                    style.add('BACKGROUND', (1, i), (1, i), whitesmoke)
+            # Time the export itself, not the file dialog
+            timing = perf.measure("export_to_pdf")
             
-            table.setStyle(style)
-            elements.append(table)
+            # Same layout as the month-end payslips; reportlab loads here
+            payslips.PayslipRenderer().write(file_path, [self.raw_results])
             
-            # Add current date with proper Arabic text handling
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            date_text = arabic_reshaper.reshape(f"تاريخ الإصدار: {current_date}")
-            date_bidi = get_display(date_text)
-            date_paragraph = Paragraph(date_bidi, styles['Normal'])
-            elements.append(Spacer(1, 0.5 * inch))
-            elements.append(date_paragraph)
-            
-            # Build PDF
-            doc.build(elements)
+            timing.stop(rows=1, path=file_path)
             
             QMessageBox.information(self, "نجاح", f"تم تصدير المرتب بنجاح إلى {file_path}")
             
@@ -1059,29 +944,19 @@ class PayrollApp(QMainWindow):
             if not file_path:
                 return  # User cancelled
             
-            # Create a single-row DataFrame with items as columns
+            # Time the export itself, not the file dialog
+            timing = perf.measure("export_to_excel")
+            
+            # Import necessary modules
+            from payroll_core.exporters import excel
+            
+            # Write a single row with items as columns
             # This inverts the data orientation from vertical to horizontal
             items = list(self.results.keys())
             values = list(self.results.values())
+            excel.write_xlsx(file_path, items, [values], sheet_name="مرتب")
             
-            # Create a DataFrame with one row, where each column is an item
-            df = pd.DataFrame([values], columns=items)
-            
-            # Create Excel writer
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                # Write DataFrame to Excel
-                df.to_excel(writer, index=False, sheet_name="مرتب")
-                
-                # Get the workbook and worksheet
-                workbook = writer.book
-                worksheet = writer.sheets["مرتب"]
-                
-                # Adjust column widths for better readability
-                for i, col in enumerate(df.columns):
-                    column_width = max(len(str(df[col].iloc[0])), len(col)) + 2
-                    # Use Excel column letters (A, B, C, ..., Z, AA, AB, ...)
-                    col_letter = chr(65 + i) if i < 26 else chr(65 + i//26 - 1) + chr(65 + i%26)
-                    worksheet.column_dimensions[col_letter].width = column_width
+            timing.stop(rows=1, path=file_path)
             
             QMessageBox.information(self, "نجاح", f"تم تصدير المرتب بنجاح إلى {file_path}")
             
@@ -1105,34 +980,17 @@ class PayrollApp(QMainWindow):
             if not file_path:
                 return  # User cancelled
             
-            # Create a new Word document
-            doc = Document()
-            
-            # Add a title
-            doc.add_heading("بيان مرتب", 0)
+            # Time the export itself, not the file dialog
+            timing = perf.measure("export_to_word")
             
-            # Create a table with the appropriate number of rows and columns
-            table = doc.add_table(rows=len(self.results) + 1, cols=2)
-            table.style = 'Table Grid'
+            # Import necessary modules
+            from payroll_core.exporters import word
             
-            # Add header row
-            header_cells = table.rows[0].cells
-            header_cells[0].text = "البند"
-            header_cells[1].text = "القيمة"
+            # Item/value table with the issue date under it
+            word.write_items(file_path, "بيان مرتب", ("البند", "القيمة"), self.results.items(),
+                             f"تاريخ الإصدار: {datetime.now().strftime('%Y-%m-%d')}")
             
-            # Add data rows
-            for i, (key, value) in enumerate(self.results.items(), 1):
-                row_cells = table.rows[i].cells
-                row_cells[0].text = key
-                row_cells[1].text = str(value)
-            
-            # Add current date
-            doc.add_paragraph("")
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            doc.add_paragraph(f"تاريخ الإصدار: {current_date}")
-            
-            # Save the document
-            doc.save(file_path)
+            timing.stop(rows=1, path=file_path)
             
             QMessageBox.information(self, "نجاح", f"تم تصدير المرتب بنجاح إلى {file_path}")
             
@@ -1217,6 +1075,11 @@ class PayrollApp(QMainWindow):
         # Update results table
         self.results_table.setFont(font)
     
+    def closeEvent(self, event):
+        # Release the shared database connection with the main window
+        self.db.close()
+        super().closeEvent(event)
+
     def show_about(self):
         about_text = """
         <h1>نظام إدارة الرواتب</h1>
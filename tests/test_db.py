@@ -0,0 +1,128 @@
+from payroll_core import bench, db, rates
+from payroll_core.writer import BulkWriter
+
+# job_title_rates as first written, with allowances in pounds
+POUNDS_RATES_SCHEMA = '''
+CREATE TABLE job_title_rates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    grade_code INTEGER NOT NULL,
+    job_title TEXT NOT NULL,
+    effective_from TEXT NOT NULL,
+    badl REAL NOT NULL,
+    gawda REAL NOT NULL,
+    diff_gawda REAL NOT NULL,
+    hafz REAL NOT NULL,
+    UNIQUE (grade_code, effective_from)
+)
+'''
+
+WIDE_INSERT = f'''
+INSERT INTO payroll ({", ".join(db.PAYROLL_COLUMNS)})
+VALUES ({", ".join("?" * len(db.PAYROLL_COLUMNS))})
+'''
+
+# Pound amounts as the original forms stored them
+WIDE_ROWS = [
+    ("E1", "سارة علي", "تصوير", "أ.د", 5000.0, 100.5, 3000.0, 10.0, 450.0, 600.0, 750.0,
+     300.0, 450.0, 4270.0, 330.0, 2600.0, 3500.0, 27559.9, "2024-01-31 10:00:00"),
+    ("E2", "أحمد حسن", "ديكور", "د", 4000.0, 80.0, 2500.55, 10.0, 375.08, 500.11, 625.14,
+     250.06, 375.08, 3120.0, 140.0, 2050.0, 2500.0, -12.34, "2024-02-29 10:00:00"),
+    # Missing employee fields and amounts
+    (None, None, None, None, None, None, None, None, None, None, None,
+     None, None, None, None, None, None, None, None),
+]
+
+
+def test_migrates_pound_amounts_to_piastres(tmp_path):
+    conn = db.connect(str(tmp_path / "payroll.db"))
+    conn.execute(db.PAYROLL_SCHEMA)
+    conn.execute(POUNDS_RATES_SCHEMA)
+    conn.executemany(WIDE_INSERT, WIDE_ROWS)
+    conn.execute(
+        "INSERT INTO job_title_rates (grade_code, job_title, effective_from, badl, gawda, "
+        "diff_gawda, hafz) VALUES (1, 'أ.د', '2000-01-01', 3500.0, 4270.0, 330.5, 2600.25)"
+    )
+    conn.commit()
+
+    db.init_database(conn)
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRATIONS)
+    types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(payroll)")}
+    assert all(types[col] == "INTEGER" for col in db.MONEY_COLUMNS)
+
+    rows = conn.execute(f"SELECT {db.PAYROLL_SELECT_COLUMNS} FROM payroll_rows ORDER BY id").fetchall()
+    assert [row[0] for row in rows] == [1, 2, 3]
+    first, second, missing = (row[1:] for row in rows)
+    assert first[4:18] == (500000, 10050, 300000, 1000, 45000, 60000, 75000,
+                           30000, 45000, 427000, 33000, 260000, 350000, 2755990)
+    assert second[6] == 250055
+    assert second[17] == -1234
+    assert first[18] == WIDE_ROWS[0][18]
+    assert missing == ("", "", "", "") + (None,) * 15
+    assert all(type(value) is int for value in first[4:18])
+
+    # Seed rates are not added on top of the converted ones
+    assert conn.execute(
+        "SELECT grade_code, badl, gawda, diff_gawda, hafz FROM job_title_rates"
+    ).fetchall() == [(1, 350000, 427000, 33050, 260025)]
+    conn.close()
+
+
+FRESH_SUMMARY = f'''
+SELECT COALESCE(substr(p.date, 1, 7), ''), e.department, e.job_title, COUNT(*),
+    {", ".join(f"COALESCE(SUM(p.{col}), 0)" for col in db.REPORT_COLUMNS)}
+FROM payroll p JOIN employees e ON e.employee_key = p.employee_key
+GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+'''
+
+
+def assert_summary_current(conn):
+    summary = conn.execute(
+        f"SELECT period, department, job_title, row_count, {', '.join(db.REPORT_COLUMNS)} "
+        "FROM payroll_summary ORDER BY 1, 2, 3"
+    ).fetchall()
+    assert summary == conn.execute(FRESH_SUMMARY).fetchall()
+
+
+def test_summary_follows_payroll_changes():
+    conn = db.connect(":memory:")
+    db.init_database(conn)
+    rows = bench.payroll_rows(bench.generate_employees(300, seed=2), rates.default_rates())
+    # A group of its own, and a row with no date or amounts
+    rows.append(("E9", "وحيد", "أرشيف", "م", 100000) + (None,) * 14)
+    BulkWriter(conn, batch_size=70).write(rows)
+    assert_summary_current(conn)
+    assert conn.execute("SELECT COUNT(*) FROM payroll_summary WHERE department = 'أرشيف'").fetchone()[0] == 1
+
+    # Empty the lone group
+    conn.execute("DELETE FROM payroll WHERE employee_key IN "
+                 "(SELECT employee_key FROM employees WHERE department = 'أرشيف')")
+    assert conn.execute("SELECT COUNT(*) FROM payroll_summary WHERE department = 'أرشيف'").fetchone()[0] == 0
+    assert_summary_current(conn)
+
+    # Move rows to another employee and another period
+    conn.execute("UPDATE payroll SET employee_key = (SELECT MAX(employee_key) FROM employees) "
+                 "WHERE id % 7 = 0")
+    conn.execute("UPDATE payroll SET date = '1999-12-31 00:00:00' WHERE id % 5 = 0")
+    conn.execute("UPDATE payroll SET salary = NULL WHERE id % 11 = 0")
+    conn.commit()
+    assert_summary_current(conn)
+    conn.close()
+
+
+def test_summary_is_filled_by_migration(tmp_path):
+    conn = db.connect(str(tmp_path / "payroll.db"))
+    conn.execute(db.PAYROLL_SCHEMA)
+    conn.executemany(WIDE_INSERT, WIDE_ROWS * 3)
+    conn.commit()
+
+    db.init_database(conn)
+    assert conn.execute("SELECT COUNT(*) FROM payroll_summary").fetchone()[0] == 3
+    assert_summary_current(conn)
+
+    # The triggers are in place after migrating
+    conn.execute(db.INSERT_PAYROLL, WIDE_ROWS[0][:4] + (100,) * 14 + ("2024-03-31 10:00:00",))
+    conn.execute("DELETE FROM payroll WHERE id = 1")
+    conn.commit()
+    assert_summary_current(conn)
+    conn.close()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from payroll_core import engine, rates
+
+RATES = rates.default_rates()
+
+# Every grade, then a title the rate table does not know
+JOB_TITLES = RATES.job_titles + ["معيد"]
+
+# basic30 in piastres, including amounts whose components land on halves
+BASIC30 = [0, 1, 2, 50, 99, 100, 120000, 250050, 300000, 333333, 1234567] + \
+    np.random.default_rng(1).integers(0, 5_000_000, 200).tolist()
+
+
+def baseline_calculate(basic30, job_title):
+    """The original form's formula, in float pounds."""
+    basic30 /= 100
+    components = {
+        "supplement": basic30 * 0.775,
+        "bhos": basic30 * 0.49,
+        "ryada": basic30 * 0.91,
+        "eshraf": basic30 * 1.3,
+        "maktabia": basic30 * 0.78,
+        "tatwer": basic30 * 0.78,
+    }
+    allowances = {
+        "أ.د": (3500, 4270, 330, 2600),
+        "أ.م.د": (3000, 3770, 230, 2475),
+        "د": (2500, 3120, 140, 2050),
+        "م.م": (1500, 2900, 100, 1850),
+        "م": (1000, 1850, 40, 1850),
+    }.get(job_title, (0, 0, 0, 0))
+    components.update(zip(("badl", "gawda", "diff_gawda", "hafz"), allowances))
+    components["salary"] = sum(components.values()) + 600 + 10 + 73.90 + 1071
+    return components
+
+
+@pytest.mark.parametrize("job_title", JOB_TITLES)
+def test_batch_matches_scalar(job_title):
+    grades = RATES.encode([job_title] * len(BASIC30))
+    batch = engine.calculate_batch(BASIC30, grades, RATES)
+    for i, basic30 in enumerate(BASIC30):
+        scalar = engine.calculate(basic30, job_title, RATES)
+        assert {name: int(values[i]) for name, values in batch.items()} == scalar
+
+
+@pytest.mark.parametrize("job_title", JOB_TITLES)
+def test_matches_float_formula_within_rounding(job_title):
+    for basic30 in BASIC30:
+        fixed = engine.calculate(basic30, job_title, RATES)
+        floating = baseline_calculate(basic30, job_title)
+        assert fixed.keys() == floating.keys()
+        for name, value in fixed.items():
+            bound = engine.MAX_SALARY_DRIFT if name == "salary" else 0.5
+            # Float noise on top of the rounding
+            assert abs(value - floating[name] * 100) <= bound + 1e-6, (basic30, name)
+
+
+def test_salary_is_sum_of_components():
+    fixed = engine.calculate(333333, "أ.د", RATES)
+    fixed_additions = sum(amount for _, amount in engine.FIXED_ADDITIONS)
+    assert fixed["salary"] == sum(v for k, v in fixed.items() if k != "salary") + fixed_additions
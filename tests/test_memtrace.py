@@ -0,0 +1,21 @@
+import importlib
+
+import pytest
+
+from payroll_core import memtrace
+
+
+@pytest.mark.parametrize("value, on", [
+    ("1", True), ("true", True), ("Yes", True), (" TRUE ", True),
+    ("0", False), ("false", False), ("no", False), ("off", False), ("", False), (None, False),
+])
+def test_environment_switch(monkeypatch, value, on):
+    if value is None:
+        monkeypatch.delenv(memtrace.ENV_VAR, raising=False)
+    else:
+        monkeypatch.setenv(memtrace.ENV_VAR, value)
+    try:
+        assert importlib.reload(memtrace).enabled() is on
+    finally:
+        monkeypatch.delenv(memtrace.ENV_VAR, raising=False)
+        importlib.reload(memtrace)
@@ -0,0 +1,44 @@
+import pytest
+
+from payroll_core import money
+
+
+@pytest.mark.parametrize("amount, minor", [
+    ("1234.5", 123450),
+    ("  12 ", 1200),
+    ("2.675", 268),
+    ("-2.675", -268),
+    ("0.005", 1),
+    ("-0.005", -1),
+    ("0.004", 0),
+    ("-0", 0),
+    # Floats round as written, not as stored in binary
+    (2.675, 268),
+    (-2.675, -268),
+    (7, 700),
+])
+def test_to_minor_rounds_halves_away_from_zero(amount, minor):
+    assert money.to_minor(amount) == minor
+
+
+@pytest.mark.parametrize("amount", ["", "abc", "1,000", "nan", "inf", "-inf", None, "1e400", "-1e400", 1e300])
+def test_to_minor_rejects_non_amounts(amount):
+    with pytest.raises(ValueError):
+        money.to_minor(amount)
+
+
+@pytest.mark.parametrize("minor, text", [
+    (0, "0.00"),
+    (5, "0.05"),
+    (-5, "-0.05"),
+    (123450, "1234.50"),
+    (-123450, "-1234.50"),
+    (None, ""),
+])
+def test_format_money(minor, text):
+    assert money.format_money(minor) == text
+
+
+def test_format_money_puts_sign_after_symbol():
+    assert money.format_money(-2755990, "$") == "$-27559.90"
+    assert money.format_money(None, "$") == ""
@@ -0,0 +1,152 @@
+import csv
+
+import pytest
+
+from payroll_core import batch, db
+
+# employee_id, employee_name, department, job_title, basic_salary, Social, basic30, enaa
+EMPLOYEES = [
+    ("E1", "سارة علي", "تصوير", "أ.د", "5000", "100", "3000", "10"),
+    ("E2", "أحمد حسن", "ديكور", "د", "4000", "80", "2500.50", "10"),
+    ("E3", "منى سعيد", "جرافيك", "م", "2000", "40", "1200", "5"),
+]
+
+PERIOD_COLUMNS = ", ".join(db.PAYROLL_COLUMNS[:-1])
+
+
+def write_input(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(batch.INPUT_COLUMNS)
+        writer.writerows(rows)
+    return str(path)
+
+
+def period_rows(conn, period):
+    return sorted(conn.execute(
+        f"SELECT {PERIOD_COLUMNS} FROM payroll_rows WHERE date = ?",
+        (f"{period}-01 00:00:00",)
+    ))
+
+
+@pytest.fixture
+def open_db(tmp_path):
+    conns = []
+
+    def open_db(name="payroll.db"):
+        conn = db.connect(str(tmp_path / name))
+        db.init_database(conn)
+        conns.append(conn)
+        return conn
+
+    yield open_db
+    for conn in conns:
+        conn.close()
+
+
+def add_rate(conn, effective_from, badl):
+    # New أ.د allowances with only badl changed
+    conn.execute(
+        "INSERT INTO job_title_rates (grade_code, job_title, effective_from, "
+        "badl, gawda, diff_gawda, hafz) VALUES (1, 'أ.د', ?, ?, 427000, 33000, 260000)",
+        (effective_from, badl)
+    )
+    conn.commit()
+
+
+def run_twice(open_db, tmp_path, second, between=None):
+    """Run October on EMPLOYEES, then November on ``second`` both
+    incrementally and with ``full``; ``between`` runs on each database after
+    October. Returns the incremental run's stats and both Novembers' rows."""
+    first_path = write_input(tmp_path / "october.csv", EMPLOYEES)
+    second_path = write_input(tmp_path / "november.csv", second)
+    results = []
+    for full in (False, True):
+        conn = open_db(f"full{full}.db")
+        batch.run_batch(conn, first_path, "2026-10")
+        if between:
+            between(conn)
+        stats = batch.run_batch(conn, second_path, "2026-11", full=full)
+        results.append((stats, period_rows(conn, "2026-11")))
+    (stats, incremental), (_, full) = results
+    return stats, incremental, full
+
+
+def test_unchanged_input_is_copied_forward(open_db, tmp_path):
+    stats, incremental, full = run_twice(open_db, tmp_path, EMPLOYEES)
+    assert (stats.computed, stats.copied) == (0, len(EMPLOYEES))
+    assert incremental == full
+
+
+def test_changed_row_is_recomputed(open_db, tmp_path):
+    second = [EMPLOYEES[0][:6] + ("3100", "10")] + EMPLOYEES[1:]
+    stats, incremental, full = run_twice(open_db, tmp_path, second)
+    assert (stats.computed, stats.copied) == (1, len(EMPLOYEES) - 1)
+    assert incremental == full
+
+
+def test_changed_rates_are_recomputed(open_db, tmp_path):
+    stats, incremental, full = run_twice(
+        open_db, tmp_path, EMPLOYEES, lambda conn: add_rate(conn, "2026-11-01", 500000))
+    assert (stats.computed, stats.copied) == (len(EMPLOYEES), 0)
+    assert incremental == full
+
+
+def test_rates_not_yet_in_force_change_nothing(open_db, tmp_path):
+    stats, incremental, full = run_twice(
+        open_db, tmp_path, EMPLOYEES, lambda conn: add_rate(conn, "2027-01-01", 500000))
+    assert (stats.computed, stats.copied) == (0, len(EMPLOYEES))
+    assert incremental == full
+
+
+def test_missing_previous_row_is_recomputed(open_db, tmp_path):
+    def drop_e2(conn):
+        conn.execute("DELETE FROM payroll WHERE id IN "
+                     "(SELECT id FROM payroll_rows WHERE employee_id = 'E2')")
+        conn.commit()
+
+    stats, incremental, full = run_twice(open_db, tmp_path, EMPLOYEES, drop_e2)
+    assert (stats.computed, stats.copied) == (1, len(EMPLOYEES) - 1)
+    assert incremental == full
+
+
+def test_rates_taking_effect_between_runs_are_applied(open_db, tmp_path):
+    source = write_input(tmp_path / "employees.csv", EMPLOYEES)
+    results = []
+    for full in (False, True):
+        conn = open_db(f"full{full}.db")
+        # A badl raise for أ.د stored ahead of time, in force from November
+        add_rate(conn, "2026-11-01", 500000)
+        batch.run_batch(conn, source, "2026-10")
+        batch.run_batch(conn, source, "2026-11", full=full)
+        results.append(period_rows(conn, "2026-11"))
+
+    incremental, full = results
+    assert incremental == full
+    badl = db.PAYROLL_COLUMNS.index("badl")
+    assert [row[badl] for row in full if row[0] == "E1"] == [500000]
+
+
+@pytest.mark.parametrize("chunk_size", [10, 2])
+def test_repeated_employee_is_rejected(open_db, tmp_path, chunk_size):
+    # E1 again as the third row: within one chunk of 10, across chunks of 2
+    source = write_input(tmp_path / "employees.csv", EMPLOYEES[:2] + EMPLOYEES[:1])
+    conn = open_db()
+    with pytest.raises(ValueError, match="employee E1 appears more than once"):
+        batch.run_batch(conn, source, "2026-10", chunk_size=chunk_size)
+    assert conn.execute("SELECT COUNT(*) FROM payroll").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM payroll_runs").fetchone()[0] == 0
+
+
+@pytest.mark.parametrize("row, message", [
+    (("E4", "علي", "", "م", "1000", "10", "500", "5"), "department and job title are required"),
+    (("E4", "علي", "تصوير", "", "1000", "10", "500", "5"), "department and job title are required"),
+    (("E4", "علي", "تصوير", "م ", "1000", "10", "500", "5"), "unknown job title 'م '"),
+    (("E4", "علي", "تصوير", "م", "1000", "10", "1e400", "5"), "basic30 must be numeric"),
+])
+def test_bad_input_is_rejected_with_its_line(open_db, tmp_path, row, message):
+    source = write_input(tmp_path / "employees.csv", EMPLOYEES + [row])
+    conn = open_db()
+    with pytest.raises(ValueError, match=f"employees.csv:5: {message}"):
+        batch.run_batch(conn, source, "2026-10")
+    assert conn.execute("SELECT COUNT(*) FROM payroll").fetchone()[0] == 0
@@ -0,0 +1,34 @@
+from payroll_core import bench, db, rates
+from payroll_core.writer import BulkWriter
+
+
+def table_state(conn):
+    return (
+        conn.execute(f"SELECT {db.PAYROLL_SELECT_COLUMNS}, employee_key FROM payroll_rows ORDER BY id").fetchall(),
+        conn.execute("SELECT * FROM employees ORDER BY employee_key").fetchall(),
+        conn.execute("SELECT * FROM payroll_summary ORDER BY period, department, job_title").fetchall(),
+    )
+
+
+def test_bulk_writes_match_single_row_inserts():
+    rows = bench.payroll_rows(bench.generate_employees(500, seed=1), rates.default_rates())
+    # Missing employee fields are filed as empty strings by both paths
+    rows += [(None, "بدون رقم", None, "د") + rows[0][4:]] * 2
+
+    states = []
+    for bulk in (True, False):
+        conn = db.connect(":memory:")
+        db.init_database(conn)
+        # An employee already on file before the batch
+        conn.execute(db.INSERT_PAYROLL, rows[3])
+        if bulk:
+            BulkWriter(conn, batch_size=120).write(rows)
+        else:
+            for row in rows:
+                conn.execute(db.INSERT_PAYROLL, row)
+            conn.commit()
+        states.append(table_state(conn))
+        conn.close()
+
+    assert states[0] == states[1]
+    assert len(states[0][0]) == len(rows) + 1